@@ -0,0 +1,424 @@
+"""
+Citation graph over harvested Articles: an edge runs from each article to
+every work its references identify. Edges are held in compressed sparse
+row (CSR) form in flat arrays, one forward (cites) and one reverse (cited
+by), so millions of edges cost a few bytes each rather than a Python
+object apiece. Nodes are interned to integer IDs; each node is keyed by
+the best identifier known for it: "PMC123", else "pmid:123", else
+"doi:10.1000/x".
+"""
+from array import array
+from collections import Counter, defaultdict, deque
+from itertools import repeat
+import json
+import os
+import re
+import sys
+import threading
+
+from .pubmed import Article, _normalize_doi, _pmcid
+
+# Node IDs in the edge arrays, and row offsets into them
+NODE_TYPECODE = "i"
+OFFSET_TYPECODE = "q"
+
+
+def _reference_keys(ref):
+    # Node keys for a Reference, best first; bare text cannot be joined on
+    keys = []
+    if ref.pmcid:
+        keys.append(_pmcid(ref.pmcid))
+    if ref.pmid:
+        keys.append(f"pmid:{ref.pmid}")
+    if ref.doi:
+        keys.append(f"doi:{_normalize_doi(ref.doi)}")
+    return keys
+
+
+def _article_keys(article):
+    # Node keys for a harvested Article, so works citing it by PMID or DOI
+    # reach the same node
+    keys = [article.pmcid]
+    if article.pmid:
+        keys.append(f"pmid:{article.pmid}")
+    if article.doi:
+        keys.append(f"doi:{_normalize_doi(article.doi)}")
+    return keys
+
+
+def _key_rank(key):
+    # Lower is better: PMC IDs, then PMIDs, then DOIs
+    return 2 if key.startswith("doi:") else 1 if key.startswith("pmid:") else 0
+
+
+def _node_key(key):
+    # "pmid:" and "doi:" keys pass through (DOIs normalised); anything else
+    # is a PMC ID, bare numbers included, as in ArticleStore
+    key = str(key).strip()
+    if key.startswith("pmid:"):
+        return key
+    if key.lower().startswith("doi:"):
+        return f"doi:{_normalize_doi(key[4:])}"
+    return _pmcid(key)
+
+
+def _merge_rows(offsets, values, size, updates):
+    """
+    Returns (offsets, values) of a CSR grown to size rows, with each row in
+    updates ({row: array of values}) replaced. Runs of untouched rows are
+    copied as array slices.
+    """
+    stored = len(offsets) - 1
+    new_offsets = array(OFFSET_TYPECODE, [0])
+    new_values = array(values.typecode)
+
+    def copy(start, stop):
+        end = min(stop, stored)
+        if start < end:
+            shift = len(new_values) - offsets[start]
+            new_values.extend(values[offsets[start]:offsets[end]])
+            if shift:
+                new_offsets.extend([offset + shift for offset in offsets[start + 1:end + 1]])
+            else:
+                new_offsets.extend(offsets[start + 1:end + 1])
+        new_offsets.extend(repeat(len(new_values), stop - max(start, end)))
+
+    done = 0
+    for row in sorted(updates):
+        copy(done, row)
+        new_values.extend(updates[row])
+        new_offsets.append(len(new_values))
+        done = row + 1
+    copy(done, size)
+    return new_offsets, new_values
+
+
+class CitationGraph:
+    """
+    Citation graph built incrementally with add() / add_many() as articles
+    arrive, and, if path (a directory) is given, loaded from and saved
+    there by save(). Re-adding an article replaces its outgoing edges.
+
+    New edges are buffered and merged into the CSR arrays before the next
+    query, or once merge_every of them (or half as many as the graph
+    holds, if more) are pending. A work
+    cited by several identifiers (say pmid and doi) is one node as long as
+    some reference, or the added article itself, names them together;
+    identifiers learned later become aliases of the node first created,
+    which is renamed to the best of them. Thread-safe.
+    """
+
+    # Edge array files, "<name>.<generation>.bin"
+    _FILE_PATTERN = re.compile(r"(out_offsets|out|in_offsets|in)\.\d+\.bin")
+
+    def __init__(self, path=None, merge_every=200_000):
+        self.path = path
+        self.merge_every = merge_every
+        self._lock = threading.RLock()
+        self._keys = []
+        self._ids = {}
+        self._out_offsets = array(OFFSET_TYPECODE, [0])
+        self._out = array(NODE_TYPECODE)
+        self._in_offsets = array(OFFSET_TYPECODE, [0])
+        self._in = array(NODE_TYPECODE)
+        self._pending = {}
+        self._pending_edges = 0
+        self._generation = 0
+        if path is not None and os.path.exists(os.path.join(path, "graph.json")):
+            self._load()
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __contains__(self, key):
+        return _node_key(key) in self._ids
+
+    @property
+    def edge_count(self):
+        with self._lock:
+            self._merge()
+            return len(self._out)
+
+    def _intern(self, key):
+        node = self._ids.get(key)
+        if node is None:
+            node = self._ids[key] = len(self._keys)
+            self._keys.append(key)
+        return node
+
+    def _resolve(self, keys):
+        # First node already known under any of keys, else a new one under
+        # the best key; the other keys become its aliases
+        ids = self._ids
+        for key in keys:
+            node = ids.get(key)
+            if node is not None:
+                break
+        else:
+            node = self._intern(keys[0])
+        if len(keys) > 1:
+            for key in keys:
+                ids.setdefault(key, node)
+            # A node first met under a lesser identifier takes the best one
+            best = keys[0]
+            if ids[best] == node and _key_rank(best) < _key_rank(self._keys[node]):
+                self._keys[node] = best
+        return node
+
+    def _node_for(self, key):
+        # Keys already interned are normalised, so a hit needs no more work
+        if isinstance(key, str):
+            node = self._ids.get(key)
+            return node if node is not None else self._resolve([_node_key(key)])
+        return self._resolve([_node_key(k) for k in key])
+
+    def add_citations(self, pmcid, cited):
+        """
+        Sets the works cited by article pmcid to cited, an iterable of node
+        keys or of key lists naming one work each (best identifier first).
+        """
+        self._set_citations([_pmcid(pmcid)], map(self._node_for, cited))
+
+    def _set_citations(self, keys, nodes):
+        # keys name the citing article, best first; nodes may be a lazy map
+        # that interns keys, so consume it locked
+        with self._lock:
+            source = self._resolve(keys)
+            targets = array(NODE_TYPECODE, dict.fromkeys(nodes))
+            previous = self._pending.get(source)
+            self._pending[source] = targets
+            self._pending_edges += len(targets) - (len(previous) if previous is not None else 0)
+            # Each merge copies the whole graph, so the buffer grows with it
+            if self._pending_edges >= max(self.merge_every, len(self._out) // 2):
+                self._merge()
+
+    def add(self, article):
+        """
+        Adds an Article (or article dict), with an edge to each reference
+        carrying a DOI, PMID or PMCID. The article's own PMID and DOI become
+        aliases of its node, so it is cited_by works that cite it by those.
+        Raises ValueError for projected Articles without references, which
+        would clear the article's edges.
+        """
+        if not isinstance(article, Article):
+            article = Article.from_dict(article)
+        if article.projected and "references" not in article:
+            raise ValueError("Projected Articles without references cannot be added")
+        if article.pmcid == "Unknown":
+            return
+        keys = [keys for keys in map(_reference_keys, article.references) if keys]
+        self._set_citations(_article_keys(article), map(self._resolve, keys))
+
+    def add_many(self, articles):
+        """
+        Adds each of articles (see add). Returns how many were given.
+        """
+        count = 0
+        for count, article in enumerate(articles, 1):
+            self.add(article)
+        return count
+
+    def _merge(self):
+        if not self._pending:
+            return
+        size = len(self._keys)
+        stored = len(self._out_offsets) - 1
+        # Reverse rows change wherever a replaced source used to point or
+        # now points
+        removed = {}
+        added = defaultdict(list)
+        for source, row in self._pending.items():
+            if source < stored:
+                for target in self._out[self._out_offsets[source]:self._out_offsets[source + 1]]:
+                    removed.setdefault(target, set()).add(source)
+            # added[target].append(source) for each target, looped in C
+            deque(map(list.append, map(added.__getitem__, row), repeat(source, len(row))), maxlen=0)
+
+        in_stored = len(self._in_offsets) - 1
+        in_updates = {}
+        for target in removed.keys() | added.keys():
+            sources = array(NODE_TYPECODE)
+            if target < in_stored:
+                sources = self._in[self._in_offsets[target]:self._in_offsets[target + 1]]
+                if target in removed:
+                    gone = removed[target]
+                    sources = array(NODE_TYPECODE, [source for source in sources if source not in gone])
+            sources.extend(added.get(target, ()))
+            in_updates[target] = sources
+
+        self._out_offsets, self._out = _merge_rows(self._out_offsets, self._out, size, self._pending)
+        self._in_offsets, self._in = _merge_rows(self._in_offsets, self._in, size, in_updates)
+        self._pending = {}
+        self._pending_edges = 0
+
+    def _node(self, key):
+        self._merge()
+        return self._ids.get(_node_key(key))
+
+    def _row(self, offsets, values, node):
+        if node >= len(offsets) - 1:
+            return values[:0]
+        return values[offsets[node]:offsets[node + 1]]
+
+    def _cites(self, node):
+        return self._row(self._out_offsets, self._out, node)
+
+    def _cited_by(self, node):
+        return self._row(self._in_offsets, self._in, node)
+
+    def out_degree(self, key):
+        """
+        Number of distinct works article key cites (0 if unknown).
+        """
+        with self._lock:
+            node = self._node(key)
+            return 0 if node is None else len(self._cites(node))
+
+    def in_degree(self, key):
+        """
+        Number of articles citing the work key (0 if unknown).
+        """
+        with self._lock:
+            node = self._node(key)
+            return 0 if node is None else len(self._cited_by(node))
+
+    def cites(self, key):
+        """
+        Keys of the works article key cites.
+        """
+        with self._lock:
+            node = self._node(key)
+            return [] if node is None else [self._keys[n] for n in self._cites(node)]
+
+    def cited_by(self, key):
+        """
+        Keys of the articles citing the work key.
+        """
+        with self._lock:
+            node = self._node(key)
+            return [] if node is None else [self._keys[n] for n in self._cited_by(node)]
+
+    def neighbours(self, key, hops=1, direction="out"):
+        """
+        Returns {key: distance} for the nodes within hops edges of key,
+        nearest first, not counting key itself. direction is "out" (what
+        key cites, transitively), "in" (who cites it) or "both".
+        """
+        if direction not in ("out", "in", "both"):
+            raise ValueError(f"Unknown direction: {direction}")
+        with self._lock:
+            start = self._node(key)
+            if start is None:
+                return {}
+            rows = [row for name, row in (("out", self._cites), ("in", self._cited_by))
+                    if direction in (name, "both")]
+            seen = bytearray(len(self._keys))
+            seen[start] = 1
+            found = {}
+            frontier = [start]
+            for distance in range(1, hops + 1):
+                reached = []
+                for node in frontier:
+                    for row in rows:
+                        for other in row(node):
+                            if not seen[other]:
+                                seen[other] = 1
+                                reached.append(other)
+                if not reached:
+                    break
+                for node in reached:
+                    found[self._keys[node]] = distance
+                frontier = reached
+            return found
+
+    def co_cited(self, key, top=10):
+        """
+        The works most often cited together with key, as [(key, count)]
+        with count the number of articles citing both, highest first; all
+        of them if top is None.
+        """
+        with self._lock:
+            node = self._node(key)
+            if node is None:
+                return []
+            counts = Counter()
+            for citer in self._cited_by(node):
+                counts.update(self._cites(citer))
+            del counts[node]
+            return [(self._keys[other], count) for other, count in counts.most_common(top)]
+
+    def co_citation(self, a, b):
+        """
+        Number of articles citing both a and b.
+        """
+        with self._lock:
+            first, second = self._node(a), self._node(b)
+            if first is None or second is None:
+                return 0
+            return len(set(self._cited_by(first)).intersection(self._cited_by(second)))
+
+    def save(self):
+        """
+        Writes the graph to path: the edge arrays as raw binary files and
+        the node keys as graph.json, which names the array files and
+        records their lengths. Each save writes new array files beside the
+        previous ones and swaps graph.json over to them last, so a save
+        interrupted midway leaves the last complete one in place.
+        """
+        if self.path is None:
+            return
+        with self._lock:
+            self._merge()
+            os.makedirs(self.path, exist_ok=True)
+            arrays = self._arrays()
+            # Never reuse a name: the files graph.json points at must stay
+            generation = self._generation + 1
+            while any(os.path.exists(os.path.join(self.path, f"{name}.{generation}.bin")) for name in arrays):
+                generation += 1
+            files = {name: f"{name}.{generation}.bin" for name in arrays}
+            for name, values in arrays.items():
+                with open(os.path.join(self.path, files[name]), "wb") as f:
+                    values.tofile(f)
+            aliases = {key: node for key, node in self._ids.items() if self._keys[node] != key}
+            meta = {
+                "byteorder": sys.byteorder,
+                "generation": generation,
+                "files": files,
+                "lengths": {name: len(values) for name, values in arrays.items()},
+                "keys": self._keys,
+                "aliases": aliases,
+            }
+            tmp_path = os.path.join(self.path, "graph.json.tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(meta, f)
+            os.replace(tmp_path, os.path.join(self.path, "graph.json"))
+            self._generation = generation
+            # Array files of earlier saves, or of ones that did not finish
+            current = set(files.values())
+            for filename in os.listdir(self.path):
+                if filename not in current and self._FILE_PATTERN.fullmatch(filename):
+                    os.remove(os.path.join(self.path, filename))
+
+    def _arrays(self):
+        return {"out_offsets": self._out_offsets, "out": self._out, "in_offsets": self._in_offsets, "in": self._in}
+
+    def _load(self):
+        with open(os.path.join(self.path, "graph.json"), encoding="utf-8") as f:
+            meta = json.load(f)
+        self._keys = meta["keys"]
+        self._ids = {key: node for node, key in enumerate(self._keys)}
+        self._ids.update(meta["aliases"])
+        self._generation = meta["generation"]
+        for name, values in self._arrays().items():
+            filename = meta["files"][name]
+            length = meta["lengths"][name]
+            del values[:]
+            with open(os.path.join(self.path, filename), "rb") as f:
+                try:
+                    values.fromfile(f, length)
+                except EOFError:
+                    raise ValueError(f"Truncated citation graph file: {filename}") from None
+                if f.read(1):
+                    raise ValueError(f"Citation graph file {filename} does not match graph.json")
+            if meta["byteorder"] != sys.byteorder:
+                values.byteswap()
@@ -1,38 +1,755 @@
 import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+import urllib3
 import xml.etree.ElementTree as ET
 from datetime import datetime, timedelta
+from email.utils import parsedate_to_datetime
+from fnmatch import fnmatch
+from functools import partial
+import atexit
+import hashlib
+import json
+from collections import OrderedDict
+from collections.abc import Mapping
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, as_completed, wait
+import io
+from itertools import islice
+from urllib.parse import parse_qsl, urlencode, urlsplit
 import os
+import random
+import re
+import sqlite3
+import sys
 import tarfile
+import tempfile
+import threading
+import time
+import zlib
+
+try:
+    import fcntl
+except ImportError:  # Windows: cross-process rate limiting is unavailable
+    fcntl = None
+
+try:
+    from lxml import etree as lxml_etree
+except ImportError:  # optional: XML parsing falls back to ElementTree
+    lxml_etree = None
 
 # Base URL for NCBI E-utilities
 BASE_URL = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils/"
 
-def search_pmc(term, max_results=5, mindate=None, maxdate=None):
+# PMC Open Access Web Service
+OA_URL = "https://www.ncbi.nlm.nih.gov/pmc/utils/oa/oa.fcgi"
+
+# PMCIDs per OA service request when resolving links in bulk
+OA_BATCH_SIZE = 100
+
+# Syncs an ID that efetch or its download keeps failing is tried in before
+# sync_pmc gives up on it (withdrawn and suppressed articles never return)
+SYNC_MAX_ATTEMPTS = 5
+
+# Least seconds between the manifest saves of successive
+# download_article_files calls
+MANIFEST_SAVE_INTERVAL = 5.0
+
+# IDs per efetch request, and the URL length above which efetch is sent as
+# a POST instead (long URLs get cut or rejected on the way to NCBI)
+EFETCH_CHUNK_SIZE = 200
+EFETCH_POST_URL_LENGTH = 2000
+
+# Most IDs a single esearch query can return; backfill windows are split
+# until each one fits under it
+ESEARCH_MAX_RESULTS = 9999
+
+# (connect, read) timeout in seconds used when a call does not pass its own
+DEFAULT_TIMEOUT = (10, 60)
+
+# NCBI request ceilings in requests per second, without and with an API key
+NCBI_RATE_LIMIT = 3
+NCBI_RATE_LIMIT_WITH_KEY = 10
+
+# Fraction of the ceiling we actually pace at, so timer jitter never lets a
+# one-second window go over
+RATE_LIMIT_HEADROOM = 0.95
+
+# Responses worth retrying: rate limiting and transient server/gateway errors
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+# Methods that can be replayed safely after an ambiguous failure
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+
+# Seconds a cached response stays fresh, per endpoint (last URL path
+# segment); endpoints not listed, such as file downloads, are never cached
+RESPONSE_CACHE_TTLS = {
+    "esearch.fcgi": 24 * 3600,
+    "efetch.fcgi": 30 * 24 * 3600,
+    "oa.fcgi": 24 * 3600,
+}
+
+# Default bound on the compressed size of a ResponseCache
+RESPONSE_CACHE_MAX_BYTES = 512 * 1024 * 1024
+
+# Parameters tying a request to an E-utility history session, which NCBI
+# expires within hours; such requests are never cached
+HISTORY_PARAMS = frozenset({"usehistory", "WebEnv", "query_key"})
+
+
+class RateLimiter:
     """
-    Searches PubMed Central for a term and returns a list of PMC IDs.
-    If no date range is provided, defaults to the last 15 days.
-    Dates should be in YYYY/MM/DD format.
+    Token bucket that paces requests to `rate` per second with bursts of up to
+    `capacity`. Safe to share between threads. If lock_path is given the bucket
+    state lives in that file under an exclusive flock, so every process using
+    the same path draws from one bucket.
     """
-    url = f"{BASE_URL}esearch.fcgi"
-    
+
+    def __init__(self, rate, capacity=1, lock_path=None):
+        if lock_path is not None and fcntl is None:
+            raise RuntimeError("Sharing a rate limiter between processes requires fcntl (POSIX)")
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self.lock_path = lock_path
+        self._lock = threading.Lock()
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+
+    @classmethod
+    def for_api_key(cls, api_key=None, lock_path=None):
+        """
+        Returns a limiter paced just under NCBI's ceiling for this api_key.
+        """
+        ceiling = NCBI_RATE_LIMIT_WITH_KEY if api_key else NCBI_RATE_LIMIT
+        return cls(ceiling * RATE_LIMIT_HEADROOM, lock_path=lock_path)
+
+    def _reserve(self, tokens, updated, now):
+        # Refill, then take one token. The balance may go negative: the caller
+        # owns a slot in the future and sleeps until it, so waiters queue up
+        # in order instead of polling.
+        tokens = min(self.capacity, tokens + (now - updated) * self.rate) - 1
+        wait = -tokens / self.rate if tokens < 0 else 0.0
+        return tokens, wait
+
+    def _reserve_shared(self):
+        # Wall-clock time, since monotonic clocks are not comparable across processes
+        with open(self.lock_path, "a+") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                f.seek(0)
+                now = time.time()
+                try:
+                    tokens, updated = (float(x) for x in f.read().split())
+                except ValueError:
+                    tokens, updated = self.capacity, now
+                tokens, wait = self._reserve(tokens, updated, now)
+                f.seek(0)
+                f.truncate()
+                f.write(f"{tokens} {now}")
+                f.flush()
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+        return wait
+
+    def reserve(self):
+        """
+        Takes one token and returns how many seconds the caller must wait
+        before sending its request. Never sleeps, so async callers can await
+        the delay instead.
+        """
+        with self._lock:
+            if self.lock_path is not None:
+                return self._reserve_shared()
+            now = time.monotonic()
+            self._tokens, wait = self._reserve(self._tokens, self._updated, now)
+            self._updated = now
+            return wait
+
+    def acquire(self):
+        """
+        Blocks until the caller may send one request.
+        """
+        wait = self.reserve()
+        if wait > 0:
+            time.sleep(wait)
+
+
+# Failures of a transfer that may succeed if retried: connection errors
+# and timeouts, plus bodies cut short. Streamed bodies read through
+# response.raw raise urllib3's errors rather than requests'.
+TRANSFER_ERRORS = (
+    requests.exceptions.ConnectionError,
+    requests.exceptions.Timeout,
+    requests.exceptions.ChunkedEncodingError,
+    urllib3.exceptions.ProtocolError,
+    urllib3.exceptions.ReadTimeoutError,
+)
+
+
+_shared_rate_limiters = {}
+_shared_rate_limiters_lock = threading.Lock()
+
+
+def get_shared_rate_limiter(api_key=None):
+    """
+    Returns the process-wide RateLimiter for api_key (see
+    RateLimiter.for_api_key), created on first use. Clients built without
+    a rate_limiter or rate_limit_file all draw from it, so any number of
+    them, sync or async, stay under NCBI's limit together.
+    """
+    with _shared_rate_limiters_lock:
+        if api_key not in _shared_rate_limiters:
+            _shared_rate_limiters[api_key] = RateLimiter.for_api_key(api_key)
+        return _shared_rate_limiters[api_key]
+
+
+class RetryPolicy:
+    """
+    Decides whether and how long to wait before retrying a failed request.
+    Backoff is exponential with full jitter, capped at backoff_max; a
+    Retry-After header from the server takes precedence. No retry is
+    scheduled once max_attempts is reached or the wait would push the total
+    time spent past max_elapsed seconds.
+
+    Requests that are not idempotent are only retried when the server cannot
+    have acted on them: a 429 rejection or a timeout while connecting.
+    """
+
+    def __init__(self, max_attempts=5, backoff_base=0.5, backoff_max=30.0, max_elapsed=300.0,
+                 statuses=RETRY_STATUSES):
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.max_elapsed = max_elapsed
+        self.statuses = statuses
+
+    def backoff(self, attempt):
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    @staticmethod
+    def retry_after(response):
+        """
+        Returns the Retry-After delay in seconds, or None if absent or malformed.
+        """
+        value = response.headers.get("Retry-After") if response is not None else None
+        if not value:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+        try:
+            when = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+        return max(0.0, when.timestamp() - time.time())
+
+    def next_delay(self, attempt, started, idempotent=True, response=None, error=None):
+        """
+        Returns seconds to sleep before attempt number `attempt + 1`, or None
+        to give up. attempt counts from 0; started is a time.monotonic() stamp.
+        """
+        if attempt + 1 >= self.max_attempts:
+            return None
+        if response is not None:
+            if response.status_code not in self.statuses:
+                return None
+            if not idempotent and response.status_code != 429:
+                return None
+        elif not idempotent and not isinstance(error, requests.exceptions.ConnectTimeout):
+            return None
+
+        delay = self.retry_after(response)
+        if delay is None:
+            delay = self.backoff(attempt)
+        if time.monotonic() - started + delay > self.max_elapsed:
+            return None
+        return delay
+
+
+class _CachingReader:
+    """
+    Wraps a streamed response's raw body, handing out decoded bytes while
+    compressing a copy. Once the body has been read to the end and the
+    caller confirms it parsed by calling commit(), on_complete receives the
+    compressed copy and the body's first head_size bytes. A body abandoned
+    halfway, or never committed, is not kept.
+    """
+
+    def __init__(self, raw, on_complete, head_size=4096):
+        self._raw = raw
+        self._on_complete = on_complete
+        self._compressor = zlib.compressobj()
+        self._parts = []
+        self._head = b""
+        self._head_size = head_size
+        self._complete = None
+        self.decode_content = True
+
+    def read(self, amt=None):
+        if amt is not None and amt < 0:
+            amt = None
+        data = self._raw.read(amt, decode_content=True)
+        if self._parts is not None:
+            if data:
+                self._parts.append(self._compressor.compress(data))
+                if len(self._head) < self._head_size:
+                    self._head += data[:self._head_size - len(self._head)]
+            if not data or amt is None:
+                self._parts.append(self._compressor.flush())
+                self._complete = (b"".join(self._parts), self._head)
+                self._parts = None
+        return data
+
+    def commit(self):
+        if self._complete is not None:
+            self._on_complete(*self._complete)
+            self._complete = None
+
+    def readable(self):
+        return True
+
+    def __getattr__(self, name):
+        return getattr(self._raw, name)
+
+
+class ResponseCache:
+    """
+    On-disk cache of E-utility and OA service responses, stored
+    zlib-compressed in SQLite at path. Entries are keyed on the URL plus
+    its sorted query and form parameters (the API key excluded) and expire
+    after the TTL of their endpoint (ttls, by last URL path segment;
+    unlisted endpoints are not cached). Once the compressed total exceeds
+    max_bytes the least recently used entries are evicted. Only successful
+    (200) responses are stored, and not those carrying an NCBI error
+    payload (which come with status 200 too) or a body that does not
+    parse: a loaded body must be well-formed JSON or XML, and a streamed
+    one is only stored once its reader commits it (see _commit_cached).
+    Requests tied to a history
+    session (HISTORY_PARAMS) are not cached at all, as the session expires
+    long before any TTL. Safe to share between threads; hits and misses
+    are counted.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS responses (
+            key TEXT PRIMARY KEY,
+            url TEXT,
+            status INTEGER,
+            headers TEXT,
+            body BLOB,
+            size INTEGER,
+            created REAL,
+            accessed REAL
+        );
+        CREATE INDEX IF NOT EXISTS responses_by_access ON responses (accessed);
+    """
+
+    # Bytes at the start of a body searched for an error payload, which
+    # NCBI keeps short
+    ERROR_SCAN_BYTES = 4096
+
+    # Headers describing the wire encoding, which no longer apply to the
+    # decoded body we store
+    DROP_HEADERS = ("content-encoding", "content-length", "transfer-encoding", "connection")
+
+    def __init__(self, path, max_bytes=RESPONSE_CACHE_MAX_BYTES, ttls=None):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.ttls = dict(RESPONSE_CACHE_TTLS if ttls is None else ttls)
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(self.SCHEMA)
+
+    def ttl(self, url):
+        return self.ttls.get(urlsplit(url).path.rsplit("/", 1)[-1])
+
+    @staticmethod
+    def cacheable(url, params=None, data=None):
+        """
+        False for requests tied to an E-utility history session.
+        """
+        names = {name for name, _ in parse_qsl(urlsplit(url).query, keep_blank_values=True)}
+        for extra in (params, data):
+            if extra:
+                names.update(name for name, _ in (extra.items() if isinstance(extra, dict) else extra))
+        return HISTORY_PARAMS.isdisjoint(names)
+
+    @staticmethod
+    def is_error_payload(head):
+        """
+        True if a body starting with head is an NCBI error answer: a JSON
+        "ERROR"/"error" member (esearch) or an <ERROR> element (efetch).
+        """
+        head = head.lstrip()
+        if head.startswith(b"{"):
+            return b'"ERROR"' in head or b'"error"' in head
+        return b"<ERROR>" in head
+
+    @staticmethod
+    def well_formed(body):
+        """
+        True if body parses as JSON (if it looks like JSON) or else as XML.
+        """
+        if body.lstrip()[:1] in (b"{", b"["):
+            try:
+                json.loads(body)
+            except ValueError:
+                return False
+            return True
+        try:
+            ET.fromstring(body)
+        except ET.ParseError:
+            return False
+        return True
+
+    @staticmethod
+    def key(url, params=None, data=None):
+        """
+        Normalized cache key: the URL without its query, then every query,
+        params and data item sorted, so argument order and GET vs POST do
+        not matter.
+        """
+        parts = urlsplit(url)
+        items = parse_qsl(parts.query, keep_blank_values=True)
+        for extra in (params, data):
+            if extra:
+                items.extend(extra.items() if isinstance(extra, dict) else extra)
+        items = sorted((str(k), str(v)) for k, v in items if k != "api_key")
+        base = f"{parts.scheme}://{parts.netloc}{parts.path}"
+        return hashlib.sha256(json.dumps([base, items]).encode()).hexdigest()
+
+    def get(self, key, ttl):
+        """
+        Returns a requests.Response rebuilt from the entry for key if it is
+        younger than ttl seconds, else None. Its body is readable both as
+        .content and through .raw, like a streamed response.
+        """
+        now = time.time()
+        with self._lock:
+            row = self._db.execute(
+                "SELECT url, status, headers, body, created FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None or now - row[4] > ttl:
+                self.misses += 1
+                return None
+            self.hits += 1
+            with self._db:
+                self._db.execute("UPDATE responses SET accessed = ? WHERE key = ?", (now, key))
+
+        url, status, headers, body, _ = row
+        body = zlib.decompress(body)
+        response = requests.Response()
+        response.status_code = status
+        response.reason = "OK"
+        response.url = url
+        response.headers = CaseInsensitiveDict(json.loads(headers))
+        response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+        response.raw = io.BytesIO(body)
+        response._content = body
+        response.from_cache = True
+        return response
+
+    def put(self, key, response, compressed):
+        """
+        Stores response under key with its body already compressed, then
+        evicts least recently used entries beyond max_bytes.
+        """
+        headers = {k: v for k, v in response.headers.items() if k.lower() not in self.DROP_HEADERS}
+        now = time.time()
+        with self._lock, self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses (key, url, status, headers, body, size, created, accessed)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, response.url, response.status_code, json.dumps(headers), compressed, len(compressed), now,
+                 now))
+            total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+            if total > self.max_bytes:
+                for old_key, size in self._db.execute(
+                        "SELECT key, size FROM responses ORDER BY accessed").fetchall():
+                    if total <= self.max_bytes:
+                        break
+                    self._db.execute("DELETE FROM responses WHERE key = ?", (old_key,))
+                    total -= size
+
+    def store(self, key, response, stream):
+        """
+        Arranges for a fresh 200 response to be cached: right away if its
+        body is already loaded and well-formed, otherwise once a streaming
+        reader has read it to the end and response.commit_cache() is called
+        (see _CachingReader).
+        """
+        if response.status_code != 200:
+            return response
+        if not stream:
+            content = response.content
+            if not self.is_error_payload(content[:self.ERROR_SCAN_BYTES]) and self.well_formed(content):
+                self.put(key, response, zlib.compress(content))
+        else:
+            def on_complete(compressed, head):
+                if not self.is_error_payload(head):
+                    self.put(key, response, compressed)
+
+            response.raw = _CachingReader(response.raw, on_complete, self.ERROR_SCAN_BYTES)
+            response.commit_cache = response.raw.commit
+        return response
+
+    def clear(self):
+        with self._lock, self._db:
+            self._db.execute("DELETE FROM responses")
+
+    def close(self):
+        self._db.close()
+
+
+class NCBIClient:
+    """
+    Pooled HTTP client shared by every network call in this module.
+    Keeps one requests.Session so repeated calls to the same NCBI host reuse
+    open keep-alive connections instead of paying a new TCP+TLS handshake.
+    pool_connections is the number of hosts to keep pools for and
+    pool_maxsize the number of open connections kept per host.
+
+    Requests to NCBI services go through a RateLimiter sized for api_key
+    (read from the NCBI_API_KEY environment variable if not given), by
+    default the one every client in the process shares (see
+    get_shared_rate_limiter). Pass rate_limit_file to share one bucket
+    between worker processes.
+
+    Transient failures are retried according to `retry` (a RetryPolicy).
+
+    With cache (a ResponseCache), idempotent calls to the endpoints it has a
+    TTL for are answered from it while fresh, without a network round trip
+    or a rate limiter token; fresh successful responses are added to it.
+    """
+
+    def __init__(self, pool_connections=4, pool_maxsize=10, timeout=DEFAULT_TIMEOUT, session=None,
+                 api_key=None, rate_limiter=None, rate_limit_file=None, retry=None, cache=None):
+        self.timeout = timeout
+        self.cache = cache
+        self.retry = retry if retry is not None else RetryPolicy()
+        self.api_key = api_key if api_key is not None else os.environ.get("NCBI_API_KEY")
+        if rate_limiter is None:
+            rate_limiter = (get_shared_rate_limiter(self.api_key) if rate_limit_file is None
+                            else RateLimiter.for_api_key(self.api_key, lock_path=rate_limit_file))
+        self.rate_limiter = rate_limiter
+        self.session = session if session is not None else requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update({"Connection": "keep-alive"})
+        self.pool_maxsize = pool_maxsize
+        self._host_slots = {}
+        self._host_slots_lock = threading.Lock()
+
+    def host_slot(self, url):
+        """
+        Returns the semaphore bounding concurrent transfers to url's host at
+        pool_maxsize, so parallel downloads never open more connections than
+        the pool keeps alive.
+        """
+        host = urlsplit(url).netloc
+        with self._host_slots_lock:
+            if host not in self._host_slots:
+                self._host_slots[host] = threading.BoundedSemaphore(self.pool_maxsize)
+            return self._host_slots[host]
+
+    def request(self, method, url, params=None, stream=False, throttle=True, idempotent=None, **kwargs):
+        """
+        Sends a request through the pooled session, retrying transient
+        failures. throttle=False skips the rate limiter, for plain file
+        transfers that are not E-utility calls. idempotent defaults to what
+        the HTTP method implies; pass True for read-only POSTs such as efetch.
+
+        When retries run out the last response is returned as is (callers
+        still raise_for_status) and the last connection error is raised.
+        """
+        kwargs.setdefault("timeout", self.timeout)
+        if idempotent is None:
+            idempotent = method.upper() in IDEMPOTENT_METHODS
+
+        cache_key = None
+        ttl = self.cache.ttl(url) if self.cache is not None and idempotent else None
+        if ttl and self.cache.cacheable(url, params, kwargs.get("data")):
+            cache_key = self.cache.key(url, params, kwargs.get("data"))
+            cached = self.cache.get(cache_key, ttl)
+            if cached is not None:
+                return cached
+
+        if self.api_key and url.startswith(BASE_URL):
+            if method.upper() == "POST" and "data" in kwargs:
+                kwargs["data"] = dict(kwargs["data"] or {}, api_key=self.api_key)
+            else:
+                params = dict(params or {}, api_key=self.api_key)
+
+        started = time.monotonic()
+        attempt = 0
+        while True:
+            if throttle:
+                self.rate_limiter.acquire()
+            try:
+                response = self.session.request(method, url, params=params, stream=stream, **kwargs)
+            except TRANSFER_ERRORS as e:
+                delay = self.retry.next_delay(attempt, started, idempotent, error=e)
+                if delay is None:
+                    raise
+            else:
+                delay = self.retry.next_delay(attempt, started, idempotent, response=response)
+                if delay is None:
+                    if cache_key is not None:
+                        return self.cache.store(cache_key, response, stream)
+                    return response
+                response.close()
+            time.sleep(delay)
+            attempt += 1
+
+    def get(self, url, params=None, stream=False, throttle=True, **kwargs):
+        return self.request("GET", url, params=params, stream=stream, throttle=throttle, **kwargs)
+
+    def close(self):
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+_default_client = None
+_default_client_lock = threading.Lock()
+
+
+def get_default_client():
+    """
+    Returns the module-level client, creating it on first use.
+    """
+    global _default_client
+    with _default_client_lock:
+        if _default_client is None:
+            _default_client = NCBIClient()
+        return _default_client
+
+
+def set_default_client(client):
+    """
+    Replaces the module-level client, e.g. to change pool sizes or timeouts.
+    Returns the previous client (None if none was made yet), left open as
+    other threads may still be using it: close it once they are done.
+    """
+    global _default_client
+    with _default_client_lock:
+        previous, _default_client = _default_client, client
+    return previous
+
+
+def _default_date_range(mindate, maxdate):
     # Default to last 15 days if no dates provided
     if mindate is None and maxdate is None:
         end_date = datetime.now()
         start_date = end_date - timedelta(days=15)
         mindate = start_date.strftime("%Y/%m/%d")
         maxdate = end_date.strftime("%Y/%m/%d")
+    return mindate, maxdate
+
+
+class SearchCache:
+    """
+    In-memory LRU cache of search results for search_pmc(cache=...),
+    holding up to max_entries results for ttl seconds each. Concurrent
+    identical searches are coalesced: the first caller runs the request
+    while the others wait for its result (or its exception, which is not
+    cached). Thread-safe; hits, misses and coalesced calls are counted.
+    """
+
+    def __init__(self, max_entries=256, ttl=300):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self._entries = OrderedDict()
+        self._inflight = {}
+        self._lock = threading.Lock()
+
+    def get_or_call(self, key, fn):
+        """
+        Returns the cached result for key, or the result of fn(), computed
+        once however many threads ask for key at the same time.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                self.misses += 1
+                future = self._inflight[key] = Future()
+            else:
+                self.coalesced += 1
+        if not leader:
+            return future.result()
+
+        try:
+            value = fn()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(value)
+            with self._lock:
+                self._entries[key] = (time.monotonic() + self.ttl, value)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+            return value
+        finally:
+            with self._lock:
+                del self._inflight[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+def search_pmc(term, max_results=5, mindate=None, maxdate=None, client=None, datetype="pdat", cache=None):
+    """
+    Searches PubMed Central for a term and returns a list of PMC IDs.
+    If no date range is provided, defaults to the last 15 days.
+    Dates should be in YYYY/MM/DD format. datetype is the date field the
+    range applies to: "pdat" (publication, the default) or "mdat"
+    (last modification).
+
+    With cache (a SearchCache), repeated searches are answered from memory
+    and identical concurrent ones share a single esearch call.
+    """
+    mindate, maxdate = _default_date_range(mindate, maxdate)
+    if cache is None:
+        return _esearch_ids(term, max_results, mindate, maxdate, client, datetype)
+    key = (term, max_results, mindate, maxdate, datetype)
+    ids = cache.get_or_call(key, lambda: tuple(_esearch_ids(term, max_results, mindate, maxdate, client, datetype)))
+    return list(ids)
+
+
+def _esearch_ids(term, max_results, mindate, maxdate, client, datetype):
+    client = client or get_default_client()
+    url = f"{BASE_URL}esearch.fcgi"
 
     params = {
         "db": "pmc",
         "term": term,
         "retmode": "json",
         "retmax": max_results,
-        "datetype": "pdat",  # Publication date
+        "datetype": datetype,
         "mindate": mindate,
         "maxdate": maxdate
     }
     
-    response = requests.get(url, params=params)
+    response = client.get(url, params=params)
     response.raise_for_status()
     data = response.json()
     
@@ -42,226 +759,2421 @@ def search_pmc(term, max_results=5, mindate=None, maxdate=None):
         return id_list
     except KeyError:
         return []
-    
 
-def get_pmc_metadata(id_list):
+
+def search_pmc_history(term, mindate=None, maxdate=None, client=None, datetype="pdat"):
     """
-    Takes a list of PMC IDs and fetches metadata including abstract, keywords, and references.
-    Uses efetch (XML) as esummary (JSON) does not provide this depth. 
+    Runs the same search as search_pmc but leaves the results on the NCBI
+    history server instead of returning IDs, so result sets of any size can
+    be paged through with iter_pmc_metadata_from_history.
+    Returns a dict with "webenv", "query_key" and "count", or None if the
+    search failed.
     """
-    if not id_list:
-        return []
+    client = client or get_default_client()
+    url = f"{BASE_URL}esearch.fcgi"
+    mindate, maxdate = _default_date_range(mindate, maxdate)
 
-    url = f"{BASE_URL}efetch.fcgi"
-    ids_string = ",".join(id_list)
-    
     params = {
         "db": "pmc",
-        "id": ids_string,
-        "retmode": "xml"
+        "term": term,
+        "retmode": "json",
+        "retmax": 0,
+        "usehistory": "y",
+        "datetype": datetype,
+        "mindate": mindate,
+        "maxdate": maxdate
     }
-    
-    response = requests.get(url, params=params)
+
+    response = client.get(url, params=params)
     response.raise_for_status()
-    
-    # Parse XML response
+    data = response.json()
+
     try:
-        root = ET.fromstring(response.content)
-    except ET.ParseError:
-        print("Failed to parse XML response")
-        return []
+        result = data["esearchresult"]
+        print(f"Searching from {mindate} to {maxdate}...")
+        return {
+            "webenv": result["webenv"],
+            "query_key": result["querykey"],
+            "count": int(result["count"]),
+        }
+    except (KeyError, ValueError):
+        return None
 
-    articles = []
-    
-    for article in root.findall(".//article"):
-        # Basic Metadata
-        meta = article.find(".//article-meta")
-        if meta is None:
-            continue
-            
-        # Title
-        title_node = meta.find(".//article-title")
-        title = "".join(title_node.itertext()) if title_node is not None else "No Title"
-        
-        # ID (PMC)
-        pmcid_node = meta.find(".//article-id[@pub-id-type='pmcid']")
-        if pmcid_node is not None:
-             # Some XMLs have "PMC123" others just "123". Ensure one "PMC" prefix.
-            pmcid_text = pmcid_node.text
-            if pmcid_text.startswith("PMC"):
-                pmcid = pmcid_text
-            else:
-                pmcid = f"PMC{pmcid_text}"
-        else:
-            pmcid = "Unknown"
 
-        # Abstract
-        abstract_node = meta.find(".//abstract")
-        abstract = "".join(abstract_node.itertext()).strip() if abstract_node is not None else "No Abstract"
-        
-        # Keywords (Proxy for MeSH)
-        keywords = []
-        for kw in meta.findall(".//kwd"):
-            if kw.text:
-                keywords.append(kw.text)
-        
-        # Publication Type
-        pub_type = article.get("article-type", "Unknown")
+DATE_FORMAT = "%Y/%m/%d"
 
-        # References
-        refs = []
-        ref_list = article.findall(".//ref")
-        for ref in ref_list:
-            # Try to get mixed-citation or citation
-            citation = ref.find(".//mixed-citation") or ref.find(".//citation") or ref.find(".//element-citation")
-            if citation is not None:
-                refs.append("".join(citation.itertext()).strip())
-        
-        # Journal Info
-        journal_node = article.find(".//journal-title")
-        journal = journal_node.text if journal_node is not None else "Unknown Journal"
 
-        # Pub Date
-        pub_date_node = article.find(".//pub-date")
-        if pub_date_node is not None:
-            year = pub_date_node.find("year")
-            month = pub_date_node.find("month")
-            day = pub_date_node.find("day")
-            pub_date = f"{year.text if year is not None else ''}-{month.text if month is not None else '01'}-{day.text if day is not None else '01'}"
-        else:
-            pub_date = "Unknown Date"
+def count_pmc(term, mindate=None, maxdate=None, client=None, datetype="pdat"):
+    """
+    Returns how many PMC records match term between mindate and maxdate
+    (YYYY/MM/DD, on the datetype field as in search_pmc), using an esearch
+    rettype=count probe that transfers no IDs.
+    """
+    client = client or get_default_client()
+    mindate, maxdate = _default_date_range(mindate, maxdate)
+    params = {
+        "db": "pmc",
+        "term": term,
+        "retmode": "json",
+        "rettype": "count",
+        "datetype": datetype,
+        "mindate": mindate,
+        "maxdate": maxdate
+    }
 
-        # Authors
-        authors = []
-        for contrib in meta.findall(".//contrib[@contrib-type='author']"):
-            surname = contrib.find(".//surname")
-            given_names = contrib.find(".//given-names")
-            if surname is not None and given_names is not None:
-                authors.append(f"{surname.text}, {given_names.text}")
-            elif surname is not None:
-                authors.append(surname.text)
-
-        articles.append({
-            "pmcid": pmcid,
-            "title": title,
-            "journal": journal,
-            "pub_date": pub_date,
-            "authors": authors,
-            "pub_type": pub_type,
-            "abstract": abstract,
-            "mesh_terms": keywords, 
-            "references": refs
-        })
-        
-    return articles
-
-
-def download_article_files(pmcid, save_dir="downloads"):
+    response = client.get(f"{BASE_URL}esearch.fcgi", params=params)
+    response.raise_for_status()
+    return int(response.json()["esearchresult"]["count"])
+
+
+def _search_window(term, mindate, maxdate, max_results, client, datetype):
+    params = {
+        "db": "pmc",
+        "term": term,
+        "retmode": "json",
+        "retmax": max_results,
+        "datetype": datetype,
+        "mindate": mindate,
+        "maxdate": maxdate
+    }
+    response = client.get(f"{BASE_URL}esearch.fcgi", params=params)
+    response.raise_for_status()
+    return response.json()["esearchresult"].get("idlist", [])
+
+
+def _split_window(mindate, maxdate):
+    # Halves an inclusive date window; None if it is a single day
+    start = datetime.strptime(mindate, DATE_FORMAT)
+    end = datetime.strptime(maxdate, DATE_FORMAT)
+    if end <= start:
+        return None
+    mid = start + (end - start) // 2
+    return ((mindate, mid.strftime(DATE_FORMAT)),
+            ((mid + timedelta(days=1)).strftime(DATE_FORMAT), maxdate))
+
+
+def plan_backfill(term, mindate, maxdate, client=None, max_results=ESEARCH_MAX_RESULTS, datetype="pdat"):
     """
-    Uses the PMC Open Access Web Service to download PDF and XML files.
-    Renames them to {pmcid}.pdf and {pmcid}.nxml.
+    Splits the date range mindate..maxdate (YYYY/MM/DD) into windows whose
+    hit counts fit under max_results, halving any window that does not,
+    and returns them as a list of (mindate, maxdate, count) tuples in date
+    order. Windows without hits are dropped. A single day that is still
+    over the cap is returned as is; searching it will be truncated.
     """
-    oa_url = "https://www.ncbi.nlm.nih.gov/pmc/utils/oa/oa.fcgi"
-    params = {"id": pmcid}
-    
-    try:
-        response = requests.get(oa_url, params=params)
-        response.raise_for_status()
-    except requests.exceptions.RequestException as e:
-        print(f"Error querying OA API for {pmcid}: {e}")
-        return
+    client = client or get_default_client()
+    windows = []
+    stack = [(mindate, maxdate)]
+    while stack:
+        lo, hi = stack.pop()
+        count = count_pmc(term, lo, hi, client=client, datetype=datetype)
+        halves = _split_window(lo, hi) if count > max_results else None
+        if halves:
+            stack.extend(reversed(halves))
+        elif count:
+            windows.append((lo, hi, count))
+    return windows
 
-    try:
-        root = ET.fromstring(response.content)
-    except ET.ParseError:
-        print(f"Failed to parse OA XML for {pmcid}")
-        return
 
-    error = root.find(".//error")
-    if error is not None:
-        print(f"OA API Error for {pmcid}: {error.get('code')} - {error.text}")
-        return
+def iter_backfill_ids(term, mindate, maxdate, max_workers=3, client=None, max_results=ESEARCH_MAX_RESULTS,
+                      datetype="pdat"):
+    """
+    Yields every PMC ID matching term between mindate and maxdate
+    (YYYY/MM/DD), for ranges far larger than one esearch query can return.
+    The range is split as in plan_backfill, but count probes and window
+    searches run concurrently (up to max_workers in flight, all paced by
+    the client's rate limiter) and IDs are yielded as each window
+    completes, so results come in completion order, not date order. IDs
+    are deduplicated across windows.
+    """
+    client = client or get_default_client()
+    seen = set()
 
-    article_dir = os.path.join(save_dir, pmcid)
-    os.makedirs(article_dir, exist_ok=True)
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        # future -> (mindate, maxdate) for count probes, None for searches
+        pending = {pool.submit(count_pmc, term, mindate, maxdate, client, datetype): (mindate, maxdate)}
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                window = pending.pop(future)
+                if window is None:
+                    for pmcid in future.result():
+                        if pmcid not in seen:
+                            seen.add(pmcid)
+                            yield pmcid
+                    continue
 
-    links = {}
-    for link in root.findall(".//link"):
-        fmt = link.get("format")
-        href = link.get("href")
-        if href:
-            if href.startswith("ftp://"):
-                href = href.replace("ftp://", "https://")
-            links[fmt] = href
+                count = future.result()
+                if not count:
+                    continue
+                halves = _split_window(*window) if count > max_results else None
+                if halves:
+                    for lo, hi in halves:
+                        pending[pool.submit(count_pmc, term, lo, hi, client, datetype)] = (lo, hi)
+                else:
+                    if count > max_results:
+                        print(f"{count} results on {window[0]} exceed {max_results}; keeping the first {max_results}")
+                    search = pool.submit(_search_window, term, *window, min(count, max_results), client, datetype)
+                    pending[search] = None
 
-    downloaded_something = False
 
-    # 1. Try Direct PDF/XML
-    if 'pdf' in links or 'xml' in links:
-        for fmt, ext in [('pdf', 'pdf'), ('xml', 'nxml')]:
-            if fmt in links:
-                href = links[fmt]
-                save_name = f"{pmcid}.{ext}"
-                save_path = os.path.join(article_dir, save_name)
-                
-                print(f"Downloading {fmt.upper()} as {save_name}...")
-                try:
-                    with requests.get(href, stream=True) as r:
-                        r.raise_for_status()
-                        with open(save_path, 'wb') as f:
-                            for chunk in r.iter_content(chunk_size=8192):
-                                f.write(chunk)
-                    print(f"Saved {save_name}")
-                    downloaded_something = True
-                except Exception as e:
-                    print(f"Failed to download {href}: {e}")
+def _intern(value):
+    # Element text can be None; only strings are interned
+    return sys.intern(value) if isinstance(value, str) else value
 
-    # 2. Fallback to TGZ
-    if not downloaded_something and 'tgz' in links:
-        href = links['tgz']
-        tgz_name = os.path.basename(href)
-        tgz_path = os.path.join(article_dir, tgz_name)
-        
-        print(f"Downloading OA Package (TGZ): {tgz_name}...")
-        try:
-            with requests.get(href, stream=True) as r:
-                r.raise_for_status()
-                with open(tgz_path, 'wb') as f:
-                    for chunk in r.iter_content(chunk_size=8192):
-                        f.write(chunk)
-            
-            print(f"Extracting {tgz_name}...")
-            try:
-                with tarfile.open(tgz_path, "r:gz") as tar:
-                    tar.extractall(path=article_dir)
-                
-                os.remove(tgz_path) 
-                downloaded_something = True
-                
-                # Rename extracted files to standard format
-                for root_path, dirs, files in os.walk(article_dir):
-                    for file in files:
-                        if file.lower().endswith(".pdf"):
-                             old_path = os.path.join(root_path, file)
-                             new_path = os.path.join(article_dir, f"{pmcid}.pdf")
-                             # Avoid overwriting if multiple PDFs exist (unlikely but possible)
-                             if not os.path.exists(new_path):
-                                 os.rename(old_path, new_path)
-                                 print(f"Renamed {file} to {pmcid}.pdf")
-
-                        elif file.lower().endswith(".nxml") or file.lower().endswith(".xml"):
-                             old_path = os.path.join(root_path, file)
-                             new_path = os.path.join(article_dir, f"{pmcid}.nxml")
-                             if not os.path.exists(new_path):
-                                 os.rename(old_path, new_path)
-                                 print(f"Renamed {file} to {pmcid}.nxml")
-                
-            except tarfile.TarError as e:
-                print(f"Failed to extract tarball: {e}")
-                
-        except Exception as e:
-            print(f"Failed to download package {href}: {e}")
 
-    if not downloaded_something:
-        print(f"No accessible files found for {pmcid} (might not be Open Access).")
+# Separators for packing lists of strings into one string. XML 1.0 text
+# cannot contain these control characters, so parsed text never does.
+# Records (authors, references) are split by _RECORD_SEP, the fields of a
+# record by _UNIT_SEP; a reference's authors are a group inside one field,
+# each author's names split by _NAME_SEP.
+_RECORD_SEP = "\x1e"
+_UNIT_SEP = "\x1f"
+_GROUP_SEP = "\x1d"
+_NAME_SEP = "\x1c"
+
+
+def _pack(items):
+    # None keeps "no items" apart from a single empty string
+    return _RECORD_SEP.join(items) if items else None
+
+
+def _unpack(packed):
+    return packed.split(_RECORD_SEP) if packed is not None else []
+
+
+class Author:
+    """
+    One article author. str() gives the "Surname, Given" form used by the
+    article dict view (just the surname if there are no given names).
+    """
+
+    __slots__ = ("surname", "given_names")
+
+    def __init__(self, surname, given_names=None):
+        self.surname = surname
+        self.given_names = given_names
+
+    @classmethod
+    def from_string(cls, name):
+        surname, sep, given_names = name.partition(", ")
+        return cls(surname, given_names if sep else None)
+
+    def pack(self, sep=_UNIT_SEP):
+        if self.given_names is None:
+            return self.surname or ""
+        return f"{self.surname or ''}{sep}{self.given_names}"
+
+    @classmethod
+    def unpack(cls, packed, sep=_UNIT_SEP):
+        surname, found, given_names = packed.partition(sep)
+        return cls(surname, given_names if found else None)
 
+    def __str__(self):
+        if self.given_names is None:
+            return self.surname or ""
+        return f"{self.surname}, {self.given_names}"
+
+    def __repr__(self):
+        return f"Author({self.surname!r}, {self.given_names!r})"
+
+    def __eq__(self, other):
+        if not isinstance(other, Author):
+            return NotImplemented
+        return (self.surname, self.given_names) == (other.surname, other.given_names)
+
+    def __hash__(self):
+        return hash((self.surname, self.given_names))
+
+
+class Reference:
+    """
+    One entry of an article's reference list. text is the flattened
+    citation; the other fields are parsed from its JATS markup and are None
+    (authors empty) when the citation does not tag them. doi is lowercased
+    and pmcid carries the "PMC" prefix, so identifiers can be joined on
+    exactly. Articles keep references packed and build these on access.
+    """
+
+    __slots__ = ("text", "authors", "year", "source", "volume", "pages", "doi", "pmid", "pmcid")
+
+    # Packed after text and authors, in this order
+    FIELDS = ("year", "source", "volume", "pages", "doi", "pmid", "pmcid")
+
+    def __init__(self, text, authors=(), year=None, source=None, volume=None, pages=None, doi=None, pmid=None,
+                 pmcid=None):
+        self.text = text
+        self.authors = tuple(authors)
+        self.year = year
+        self.source = source
+        self.volume = volume
+        self.pages = pages
+        self.doi = doi
+        self.pmid = pmid
+        self.pmcid = pmcid
+
+    def pack(self):
+        values = [getattr(self, name) for name in self.FIELDS]
+        if not self.authors and all(value is None for value in values):
+            return self.text
+        authors = _GROUP_SEP.join(author.pack(_NAME_SEP) for author in self.authors)
+        return _UNIT_SEP.join([self.text, authors] + [value or "" for value in values])
+
+    @classmethod
+    def unpack(cls, packed):
+        text, *rest = packed.split(_UNIT_SEP)
+        if not rest:
+            return cls(text)
+        authors = [Author.unpack(author, _NAME_SEP) for author in rest[0].split(_GROUP_SEP)] if rest[0] else ()
+        return cls(text, authors, *(value or None for value in rest[1:]))
+
+    @property
+    def identifiers(self):
+        """
+        The identifiers the citation carries, as {"doi"|"pmid"|"pmcid": value}.
+        """
+        return {name: getattr(self, name) for name in ("doi", "pmid", "pmcid") if getattr(self, name)}
+
+    def to_dict(self):
+        data = {"text": self.text, "authors": [str(author) for author in self.authors]}
+        data.update((name, getattr(self, name)) for name in self.FIELDS)
+        return data
+
+    def __str__(self):
+        return self.text
+
+    def __repr__(self):
+        return f"Reference({self.text!r})"
+
+    def __eq__(self, other):
+        if not isinstance(other, Reference):
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in self.__slots__)
+
+    def __hash__(self):
+        return hash((self.text, self.doi, self.pmid, self.pmcid))
+
+
+class Article(Mapping):
+    """
+    Metadata of one PMC article, as yielded by iter_pmc_metadata and
+    returned by get_pmc_metadata(..., as_dicts=False).
+
+    A slotted record. Authors and references are packed into a single
+    string each instead of one object per entry, and strings that repeat
+    across a corpus (journal, keywords, ...) are interned, so a large
+    corpus holds far fewer Python objects. The authors, keywords and
+    references attributes give tuples of Author, str and Reference, built
+    on access. A parsed Article keeps each reference as its text plus the
+    citation element until references is first read, so the structured
+    fields cost nothing for callers that only want the text.
+
+    A lazy Article (see Article.lazy) parses abstract, authors and
+    references from its XML subtree the first time one of them is read,
+    then lets the subtree go. A projected Article (parsed with fields=...)
+    only has the keys it was parsed with; the other attributes are None or
+    empty. pmid and doi, the article's own identifiers (doi normalised as
+    in Reference), are attributes only, not keys.
+
+    It is also a read-only Mapping with the keys of the original article
+    dicts, authors and references given back as lists of strings, so
+    article["title"], .get(), dict(article) and comparison with a dict keep
+    working. It is not a dict, so json.dumps rejects it and it cannot be
+    modified: use to_dict() for a plain dict.
+    """
+
+    __slots__ = ("pmcid", "pmid", "doi", "title", "journal", "pub_date", "pub_type", "keywords", "_abstract",
+                 "_authors", "_references", "_loader", "_fields")
+
+    KEYS = ("pmcid", "title", "journal", "pub_date", "authors", "pub_type", "abstract", "mesh_terms",
+            "references")
+
+    def __init__(self, pmcid, title, journal, pub_date, pub_type, abstract, authors=(), keywords=(),
+                 references=(), fields=None, pmid=None, doi=None):
+        """
+        authors is an iterable of Author, references one of Reference or
+        citation strings. fields, from Article.fields(), marks a projected
+        Article.
+        """
+        self._fields = fields
+        self.pmcid = pmcid
+        self.pmid = pmid
+        self.doi = doi
+        self.title = title
+        self.journal = _intern(journal)
+        self.pub_date = _intern(pub_date)
+        self.pub_type = _intern(pub_type)
+        self.keywords = tuple(_intern(kw) for kw in keywords)
+        self._loader = None
+        self._set_heavy_fields(abstract, authors, references)
+
+    @classmethod
+    def fields(cls, fields):
+        """
+        Validates a field projection: returns the requested keys in KEYS
+        order, always including pmcid, or None (every field) for None.
+        Raises ValueError for unknown keys.
+        """
+        if fields is None:
+            return None
+        if isinstance(fields, str):
+            fields = (fields,)
+        unknown = set(fields).difference(cls.KEYS)
+        if unknown:
+            raise ValueError(f"Unknown article fields: {', '.join(sorted(unknown))}")
+        return tuple(key for key in cls.KEYS if key == "pmcid" or key in fields)
+
+    @classmethod
+    def lazy(cls, pmcid, title, journal, pub_date, pub_type, keywords, loader, fields=None, pmid=None, doi=None):
+        """
+        Builds an Article whose abstract, authors and references come from
+        loader(), a callable returning them as an (abstract, authors,
+        references) tuple (see __init__), called once on first access.
+        """
+        article = cls(pmcid, title, journal, pub_date, pub_type, None, keywords=keywords, fields=fields, pmid=pmid,
+                      doi=doi)
+        article._loader = loader
+        return article
+
+    @property
+    def projected(self):
+        """
+        True if only some fields were parsed (see Article.fields).
+        """
+        return self._fields is not None
+
+    # Key -> (slot holding it, value when projected out)
+    _KEY_SLOTS = {"title": ("title", None), "journal": ("journal", None), "pub_date": ("pub_date", None),
+                  "pub_type": ("pub_type", None), "abstract": ("_abstract", None), "authors": ("_authors", None),
+                  "mesh_terms": ("keywords", ()), "references": ("_references", None)}
+
+    def project(self, fields):
+        """
+        Returns a copy with only the keys in fields (see Article.fields), as
+        if it had been parsed with them, or self if fields is None.
+        """
+        fields = Article.fields(fields)
+        if fields is None:
+            return self
+        self._load()
+        article = Article.__new__(Article)
+        for name in self.__slots__:
+            setattr(article, name, getattr(self, name))
+        for key, (name, empty) in self._KEY_SLOTS.items():
+            if key not in fields:
+                setattr(article, name, empty)
+        article._fields = fields
+        return article
+
+    def _set_heavy_fields(self, abstract, authors, references):
+        self._abstract = abstract
+        self._authors = _pack([author.pack() for author in authors])
+        self._references = _pack([ref.pack() if isinstance(ref, Reference) else ref for ref in references])
+
+    def _load(self):
+        loader = self._loader
+        if loader is not None:
+            self._set_heavy_fields(*loader())
+            self._loader = None
+
+    @property
+    def loaded(self):
+        """
+        False while a lazy Article has not parsed its heavy fields yet.
+        """
+        return self._loader is None
+
+    @classmethod
+    def from_dict(cls, data):
+        """
+        Builds an Article from an article dict as get_pmc_metadata used to
+        return, taking pmid and doi too if the dict has them.
+        """
+        return cls(data["pmcid"], data["title"], data["journal"], data["pub_date"], data["pub_type"],
+                   data["abstract"], [Author.from_string(name) for name in data["authors"]],
+                   data["mesh_terms"], data["references"], pmid=data.get("pmid"), doi=data.get("doi"))
+
+    @property
+    def abstract(self):
+        self._load()
+        return self._abstract
+
+    @property
+    def authors(self):
+        self._load()
+        return tuple(Author.unpack(packed) for packed in _unpack(self._authors))
+
+    @property
+    def references(self):
+        self._load()
+        return tuple(Reference.unpack(packed) for packed in _unpack(self._references))
+
+    def __getitem__(self, key):
+        if self._fields is not None and key not in self._fields:
+            raise KeyError(key)
+        if key == "authors":
+            return [str(author) for author in self.authors]
+        if key == "mesh_terms":
+            return list(self.keywords)
+        if key == "references":
+            self._load()
+            return [packed.partition(_UNIT_SEP)[0] for packed in _unpack(self._references)]
+        if key in self.KEYS:
+            return getattr(self, key)
+        raise KeyError(key)
+
+    def __iter__(self):
+        return iter(self.KEYS if self._fields is None else self._fields)
+
+    def __len__(self):
+        return len(self.KEYS if self._fields is None else self._fields)
+
+    def to_dict(self):
+        return {key: self[key] for key in self}
+
+    def __repr__(self):
+        return f"Article({self.pmcid!r}, {self.title!r})"
+
+
+def _parse_article_reference(article):
+    """
+    Extracts the metadata dict for one <article> element, or None if it has
+    no article-meta.
+
+    Original implementation with one descendant search per field, kept as
+    the reference that _parse_article must match.
+    """
+    # Basic Metadata
+    meta = article.find(".//article-meta")
+    if meta is None:
+        return None
+
+    # Title
+    title_node = meta.find(".//article-title")
+    title = "".join(title_node.itertext()) if title_node is not None else "No Title"
+
+    # ID (PMC)
+    pmcid_node = meta.find(".//article-id[@pub-id-type='pmcid']")
+    if pmcid_node is not None:
+         # Some XMLs have "PMC123" others just "123". Ensure one "PMC" prefix.
+        pmcid_text = pmcid_node.text
+        if pmcid_text.startswith("PMC"):
+            pmcid = pmcid_text
+        else:
+            pmcid = f"PMC{pmcid_text}"
+    else:
+        pmcid = "Unknown"
+
+    # Abstract
+    abstract_node = meta.find(".//abstract")
+    abstract = "".join(abstract_node.itertext()).strip() if abstract_node is not None else "No Abstract"
+
+    # Keywords (Proxy for MeSH)
+    keywords = []
+    for kw in meta.findall(".//kwd"):
+        if kw.text:
+            keywords.append(kw.text)
+
+    # Publication Type
+    pub_type = article.get("article-type", "Unknown")
+
+    # References
+    refs = []
+    ref_list = article.findall(".//ref")
+    for ref in ref_list:
+        # Try to get mixed-citation or citation
+        citation = ref.find(".//mixed-citation")
+        if citation is None:
+            citation = ref.find(".//citation")
+        if citation is None:
+            citation = ref.find(".//element-citation")
+        if citation is not None:
+            refs.append("".join(citation.itertext()).strip())
+
+    # Journal Info
+    journal_node = article.find(".//journal-title")
+    journal = journal_node.text if journal_node is not None else "Unknown Journal"
+
+    # Pub Date
+    pub_date_node = article.find(".//pub-date")
+    if pub_date_node is not None:
+        year = pub_date_node.find("year")
+        month = pub_date_node.find("month")
+        day = pub_date_node.find("day")
+        pub_date = f"{year.text if year is not None else ''}-{month.text if month is not None else '01'}-{day.text if day is not None else '01'}"
+    else:
+        pub_date = "Unknown Date"
+
+    # Authors
+    authors = []
+    for contrib in meta.findall(".//contrib[@contrib-type='author']"):
+        surname = contrib.find(".//surname")
+        given_names = contrib.find(".//given-names")
+        if surname is not None and given_names is not None:
+            authors.append(f"{surname.text}, {given_names.text}")
+        elif surname is not None:
+            authors.append(surname.text)
+
+    return {
+        "pmcid": pmcid,
+        "title": title,
+        "journal": journal,
+        "pub_date": pub_date,
+        "authors": authors,
+        "pub_type": pub_type,
+        "abstract": abstract,
+        "mesh_terms": keywords,
+        "references": refs
+    }
+
+
+# Citation tags in the order a <ref> is searched for them
+_CITATION_TAGS = ("mixed-citation", "citation", "element-citation")
+
+
+def _find_citation(ref):
+    """
+    Returns the citation element of a <ref>: the first mixed-citation
+    descendant, else citation, else element-citation. Uses the C-level
+    Element.iter rather than ElementPath find, which dominates the cost of
+    small lookups like this one.
+    """
+    for tag in _CITATION_TAGS:
+        for citation in ref.iter(tag):
+            return citation
+    return None
+
+
+def _first(node, tag):
+    # First descendant (or node itself) with tag in document order, via the
+    # C-level Element.iter
+    for found in node.iter(tag):
+        return found
+    return None
+
+
+def _find_front(article, front, tag):
+    # Front matter precedes body and back, so the first match in it is the
+    # first in the article; only look further if it has none
+    node = _first(front, tag)
+    if node is None and front is not article:
+        node = _first(article, tag)
+    return node
+
+
+def _text(node):
+    return "".join(node.itertext())
+
+
+def _pub_date(pub_date_node):
+    if pub_date_node is None:
+        return "Unknown Date"
+    year = pub_date_node.find("year")
+    month = pub_date_node.find("month")
+    day = pub_date_node.find("day")
+    return f"{year.text if year is not None else ''}-{month.text if month is not None else '01'}-{day.text if day is not None else '01'}"
+
+
+def _article_ids(pmid_node, doi_node):
+    # An article's own PMID and DOI from its <article-id> elements, or None
+    pmid = (pmid_node.text or "").strip() if pmid_node is not None else ""
+    doi = (doi_node.text or "").strip() if doi_node is not None else ""
+    return pmid or None, _normalize_doi(doi) if doi else None
+
+
+def _wants(fields, key):
+    return fields is None or key in fields
+
+
+_DOI_PREFIXES = ("https://doi.org/", "http://doi.org/", "https://dx.doi.org/", "http://dx.doi.org/", "doi:")
+
+
+def _normalize_doi(doi):
+    # DOIs are case-insensitive and often cited as resolver URLs
+    doi = doi.strip().lower()
+    if doi.startswith(_DOI_PREFIXES):
+        for prefix in _DOI_PREFIXES:
+            if doi.startswith(prefix):
+                return doi[len(prefix):]
+    return doi
+
+
+# Elements naming one author of a cited work
+_REFERENCE_NAME_TAGS = frozenset({"name", "string-name", "collab"})
+
+# Citation elements whose first occurrence gives a Reference field
+_REFERENCE_FIELD_TAGS = frozenset({"year", "source", "volume", "fpage", "lpage", "elocation-id"})
+
+
+def _reference_author(node):
+    # Packed Author (see Author.pack) of a citation name, "" if it is empty
+    if node.tag != "collab":
+        surname = given_names = None
+        for part in node.iter():
+            tag = part.tag
+            if tag == "surname":
+                if surname is None:
+                    surname = part.text or ""
+            elif tag == "given-names" and given_names is None:
+                given_names = part.text or ""
+        if surname is not None:
+            return surname if given_names is None else f"{surname}{_NAME_SEP}{given_names}"
+    return _text(node).strip()
+
+
+def _pack_reference(citation, text):
+    """
+    Returns the packed Reference (see Reference.pack) for a citation
+    element (mixed-, element- or citation) whose flattened text is text,
+    in one walk over the citation. Works on ElementTree and lxml elements
+    alike. Authors are taken from the author person-groups, or from every
+    name in the citation if it has none. Packs directly rather than
+    through Reference and Author objects, as every citation of every
+    parsed article comes through here.
+    """
+    found = {}
+    ids = {}
+    names = []
+    group_names = []
+    has_groups = False
+
+    for node in citation.iter():
+        tag = node.tag
+        if tag in _REFERENCE_FIELD_TAGS:
+            if tag not in found:
+                # source may hold markup such as <italic>; the others are plain text
+                found[tag] = ((_text(node) if tag == "source" else node.text) or "").strip()
+        elif tag == "pub-id":
+            kind = node.get("pub-id-type")
+            if kind in ("doi", "pmid", "pmcid") and kind not in ids:
+                value = (node.text or "").strip()
+                if value:
+                    ids[kind] = value
+        elif tag == "person-group":
+            has_groups = True
+            if node.get("person-group-type", "author") == "author":
+                group_names += [name for name in node.iter() if name.tag in _REFERENCE_NAME_TAGS]
+        elif tag in _REFERENCE_NAME_TAGS and not has_groups:
+            names.append(node)
+
+    authors = [author for author in map(_reference_author, group_names if has_groups else names) if author]
+    get = found.get
+    fpage = get("fpage")
+    if fpage:
+        lpage = get("lpage")
+        pages = f"{fpage}-{lpage}" if lpage else fpage
+    else:
+        pages = get("elocation-id", "")
+    doi = ids.get("doi")
+    pmcid = ids.get("pmcid")
+    # Same order as Reference.FIELDS
+    values = (get("year", ""), get("source", ""), get("volume", ""), pages, _normalize_doi(doi) if doi else "",
+              ids.get("pmid", ""), _pmcid(pmcid) if pmcid else "")
+    if not authors and not any(values):
+        return text
+    return _UNIT_SEP.join((text, _GROUP_SEP.join(authors)) + values)
+
+
+def _parse_heavy_fields(article, meta, fields=None):
+    """
+    Returns (abstract, authors, references) of an article: the fields that
+    cost the most to extract, parsed separately so lazy Articles can defer
+    them. references are packed (see _pack_reference). Fields left out of
+    the fields projection come back empty.
+    """
+    abstract = None
+    if _wants(fields, "abstract"):
+        abstract_node = _first(meta, "abstract")
+        abstract = _text(abstract_node).strip() if abstract_node is not None else "No Abstract"
+
+    authors = []
+    if _wants(fields, "authors"):
+        for contrib in meta.iter("contrib"):
+            if contrib.get("contrib-type") != "author":
+                continue
+            surname = _first(contrib, "surname")
+            if surname is not None:
+                given_names = _first(contrib, "given-names")
+                authors.append(Author(surname.text, given_names.text if given_names is not None else None))
+
+    refs = []
+    if _wants(fields, "references"):
+        for ref in article.iter("ref"):
+            citation = _find_citation(ref)
+            if citation is not None:
+                refs.append(_pack_reference(citation, _text(citation).strip()))
+    return abstract, authors, refs
+
+
+def _parse_article(article, lazy=False, fields=None):
+    """
+    Extracts the Article for one <article> element, or None if it has no
+    article-meta. With lazy, abstract, authors and references are parsed
+    from the element on first access instead (see Article.lazy). fields
+    (see Article.fields) limits extraction to those keys.
+
+    Every lookup is a C-level Element.iter over the smallest subtree that
+    holds the field: front matter for the metadata, <ref> elements for the
+    references, so <body> is never walked in Python. This replaced an
+    earlier single walk over the whole article dispatching on tag: scoped
+    C-level lookups are faster, and they let lazy Articles leave the heavy
+    fields for later. Output is identical to _parse_article_reference, as
+    tests/test_parse.py checks.
+    """
+    fields = Article.fields(fields)
+    front = article.find("front")
+    if front is None:
+        front = article
+    meta = _find_front(article, front, "article-meta")
+    if meta is None:
+        return None
+
+    title = None
+    if _wants(fields, "title"):
+        title_node = _first(meta, "article-title")
+        title = _text(title_node) if title_node is not None else "No Title"
+
+    id_nodes = {}
+    for id_node in meta.iter("article-id"):
+        id_nodes.setdefault(id_node.get("pub-id-type"), id_node)
+    pmcid_node = id_nodes.get("pmcid")
+    if pmcid_node is not None:
+        # Some XMLs have "PMC123" others just "123". Ensure one "PMC" prefix.
+        pmcid_text = pmcid_node.text
+        pmcid = pmcid_text if pmcid_text.startswith("PMC") else f"PMC{pmcid_text}"
+    else:
+        pmcid = "Unknown"
+    pmid, doi = _article_ids(id_nodes.get("pmid"), id_nodes.get("doi"))
+
+    keywords = [kw.text for kw in meta.iter("kwd") if kw.text] if _wants(fields, "mesh_terms") else []
+    journal = pub_date = pub_type = None
+    if _wants(fields, "journal"):
+        journal_node = _find_front(article, front, "journal-title")
+        journal = journal_node.text if journal_node is not None else "Unknown Journal"
+    if _wants(fields, "pub_date"):
+        pub_date = _pub_date(_find_front(article, front, "pub-date"))
+    if _wants(fields, "pub_type"):
+        pub_type = article.get("article-type", "Unknown")
+
+    if lazy:
+        return Article.lazy(pmcid, title, journal, pub_date, pub_type, keywords,
+                            partial(_parse_heavy_fields, article, meta, fields), fields, pmid, doi)
+    abstract, authors, refs = _parse_heavy_fields(article, meta, fields)
+    return Article(pmcid, title, journal, pub_date, pub_type, abstract, authors, keywords, refs, fields, pmid, doi)
+
+
+class ElementTreeBackend:
+    """
+    XML parser backend on the standard library's xml.etree.ElementTree.
+    """
+
+    name = "etree"
+    ParseError = ET.ParseError
+
+    def fromstring(self, content):
+        return ET.fromstring(content)
+
+    def iter_articles(self, source, keep=False):
+        """
+        Yields each top-level <article> element of a streamed document once
+        it is complete, clearing it after the caller is done with it unless
+        keep is set (it is then only dropped from the tree).
+        """
+        root = None
+        depth = 0
+        for event, elem in ET.iterparse(source, events=("start", "end")):
+            if event == "start":
+                if root is None:
+                    root = elem
+                if elem.tag == "article":
+                    depth += 1
+                continue
+            if elem.tag != "article":
+                continue
+            depth -= 1
+            if depth:
+                continue
+
+            yield elem
+            # Drop the finished article and everything the root has
+            # accumulated so far
+            if not keep:
+                elem.clear()
+            root.clear()
+
+    def parse_article(self, article, lazy=False, fields=None):
+        return _parse_article(article, lazy, fields)
+
+
+class LxmlBackend:
+    """
+    XML parser backend on lxml, extracting fields with precompiled XPath
+    expressions and lxml's C-level text serialization. Produces the same
+    Articles as ElementTreeBackend. Comments and processing instructions are
+    dropped while parsing, as ElementTree does.
+    """
+
+    name = "lxml"
+
+    def __init__(self):
+        if lxml_etree is None:
+            raise RuntimeError("lxml is not installed")
+        self.ParseError = lxml_etree.XMLSyntaxError
+        self._parser = lxml_etree.XMLParser(remove_comments=True, remove_pis=True, huge_tree=True)
+
+        def xpath(expr):
+            # smart_strings=False: plain str results that do not keep the tree alive
+            return lxml_etree.XPath(expr, smart_strings=False)
+
+        self._meta = xpath("(.//article-meta)[1]")
+        self._title = xpath("(.//article-title)[1]")
+        self._pmcid = xpath("(.//article-id[@pub-id-type='pmcid'])[1]")
+        self._pmid = xpath("(.//article-id[@pub-id-type='pmid'])[1]")
+        self._doi = xpath("(.//article-id[@pub-id-type='doi'])[1]")
+        self._abstract = xpath("(.//abstract)[1]")
+        self._keywords = xpath(".//kwd")
+        self._authors = xpath(".//contrib[@contrib-type='author']")
+        self._surname = xpath("(.//surname)[1]")
+        self._given_names = xpath("(.//given-names)[1]")
+        self._refs = xpath(".//ref")
+        self._citations = tuple(xpath(f"(.//{tag})[1]") for tag in _CITATION_TAGS)
+        self._journal = xpath("(.//journal-title)[1]")
+        self._pub_date = xpath("(.//pub-date)[1]")
+        self._string = xpath("string()")
+
+    def fromstring(self, content):
+        return lxml_etree.fromstring(content, self._parser)
+
+    def iter_articles(self, source, keep=False):
+        """
+        Yields each top-level <article> element of a streamed document once
+        it is complete, clearing it after the caller is done with it unless
+        keep is set (it is then only unhooked from the tree). Only
+        <article> end events cross into Python; lxml builds everything else
+        in C.
+        """
+        events = lxml_etree.iterparse(source, events=("end",), tag="article", remove_comments=True,
+                                      remove_pis=True, huge_tree=True)
+        for _, elem in events:
+            if next(elem.iterancestors("article"), None) is not None:
+                continue
+
+            yield elem
+            # lxml keeps parent links, so unhook finished siblings from the
+            # parent rather than clearing it while the parser is inside it
+            if not keep:
+                elem.clear()
+            parent = elem.getparent()
+            if parent is not None:
+                while elem.getprevious() is not None:
+                    del parent[0]
+
+    def _first(self, xpath, node):
+        found = xpath(node)
+        return found[0] if found else None
+
+    def parse_article(self, article, lazy=False, fields=None):
+        fields = Article.fields(fields)
+        meta = self._first(self._meta, article)
+        if meta is None:
+            return None
+
+        title = None
+        if _wants(fields, "title"):
+            title_node = self._first(self._title, meta)
+            title = self._string(title_node) if title_node is not None else "No Title"
+
+        pmcid_node = self._first(self._pmcid, meta)
+        if pmcid_node is not None:
+            # Some XMLs have "PMC123" others just "123". Ensure one "PMC" prefix.
+            pmcid_text = pmcid_node.text
+            pmcid = pmcid_text if pmcid_text.startswith("PMC") else f"PMC{pmcid_text}"
+        else:
+            pmcid = "Unknown"
+        pmid, doi = _article_ids(self._first(self._pmid, meta), self._first(self._doi, meta))
+
+        keywords = [kw.text for kw in self._keywords(meta) if kw.text] if _wants(fields, "mesh_terms") else []
+        journal = pub_date = pub_type = None
+        if _wants(fields, "journal"):
+            journal_node = self._first(self._journal, article)
+            journal = journal_node.text if journal_node is not None else "Unknown Journal"
+        if _wants(fields, "pub_date"):
+            pub_date = _pub_date(self._first(self._pub_date, article))
+        if _wants(fields, "pub_type"):
+            pub_type = article.get("article-type", "Unknown")
+
+        if lazy:
+            return Article.lazy(pmcid, title, journal, pub_date, pub_type, keywords,
+                                partial(self._parse_heavy_fields, article, meta, fields), fields, pmid, doi)
+        abstract, authors, refs = self._parse_heavy_fields(article, meta, fields)
+        return Article(pmcid, title, journal, pub_date, pub_type, abstract, authors, keywords, refs, fields, pmid,
+                       doi)
+
+    def _parse_heavy_fields(self, article, meta, fields=None):
+        abstract = None
+        if _wants(fields, "abstract"):
+            abstract_node = self._first(self._abstract, meta)
+            abstract = self._string(abstract_node).strip() if abstract_node is not None else "No Abstract"
+
+        authors = []
+        if _wants(fields, "authors"):
+            for contrib in self._authors(meta):
+                surname = self._first(self._surname, contrib)
+                if surname is not None:
+                    given_names = self._first(self._given_names, contrib)
+                    authors.append(Author(surname.text, given_names.text if given_names is not None else None))
+
+        refs = []
+        if _wants(fields, "references"):
+            for ref in self._refs(article):
+                for xpath in self._citations:
+                    citation = self._first(xpath, ref)
+                    if citation is not None:
+                        refs.append(_pack_reference(citation, self._string(citation).strip()))
+                        break
+        return abstract, authors, refs
+
+
+_backends = {}
+_backends_lock = threading.Lock()
+
+
+def get_parser_backend(name=None):
+    """
+    Returns the shared parser backend called name ("lxml" or "etree").
+    With no name, lxml is used when installed and ElementTree otherwise.
+    """
+    if name is None:
+        name = "lxml" if lxml_etree is not None else "etree"
+    with _backends_lock:
+        if name not in _backends:
+            if name == "lxml":
+                _backends[name] = LxmlBackend()
+            elif name == "etree":
+                _backends[name] = ElementTreeBackend()
+            else:
+                raise ValueError(f"Unknown parser backend: {name}")
+        return _backends[name]
+
+
+def _resolve_backend(backend):
+    # Accept a backend instance, a backend name or None
+    if backend is None or isinstance(backend, str):
+        return get_parser_backend(backend)
+    return backend
+
+
+class _ElementSkipper:
+    """
+    Binary file object over source that leaves out every element named in
+    tags, with all its content, before a parser ever sees the bytes. Works
+    on the raw stream, so the elements must not nest inside themselves,
+    which holds for the JATS <body> and <back>. Comments, CDATA sections
+    and processing instructions are stepped over whole, so tags written
+    inside them are not taken for markup.
+    """
+
+    CHUNK_SIZE = 65536
+    # Bytes to hold back at a read boundary in case they start a tag
+    HOLD = 64
+    # Closing delimiter of each construct whose content is not markup
+    TERMINATORS = {b"!--": b"-->", b"![CDATA[": b"]]>", b"?": b"?>"}
+
+    def __init__(self, source, tags):
+        names = b"|".join(re.escape(tag.encode()) for tag in tags)
+        self._open = re.compile(rb"<(?:(!--|!\[CDATA\[|\?)|(" + names + rb")(?=[\s/>]))")
+        self._source = source
+        self._buffer = b""
+        self._ready = b""
+        self._close = None
+        self._eof = False
+        self._done = False
+
+    def _fill(self):
+        chunk = self._source.read(self.CHUNK_SIZE)
+        if chunk:
+            self._buffer += chunk
+        else:
+            self._eof = True
+
+    def _pass(self, data):
+        # Bytes the parser gets, unless they are inside a skipped element
+        if self._close is None:
+            self._ready += data
+
+    def _more(self):
+        if not self._eof:
+            self._fill()
+            return
+        self._pass(self._buffer)
+        self._buffer = b""
+        self._done = True
+
+    def _step(self):
+        buffer = self._buffer
+        match = (self._open if self._close is None else self._close).search(buffer)
+        if match is None:
+            cut = len(buffer)
+            if not self._eof:
+                cut = buffer.rfind(b"<", max(0, len(buffer) - self.HOLD))
+                if cut < 0:
+                    cut = len(buffer)
+            self._pass(buffer[:cut])
+            self._buffer = buffer[cut:]
+            self._more()
+            return
+
+        if match.group(1):
+            # Comment, CDATA section or processing instruction
+            terminator = self.TERMINATORS[match.group(1)]
+            end = buffer.find(terminator, match.end())
+            if end < 0:
+                self._pass(buffer[:match.start()])
+                self._buffer = buffer[match.start():]
+                self._more()
+                return
+            end += len(terminator)
+            self._pass(buffer[:end])
+            self._buffer = buffer[end:]
+            return
+
+        if self._close is not None:
+            # Closing tag of the skipped element
+            self._buffer = buffer[match.end():]
+            self._close = None
+            return
+
+        self._ready += buffer[:match.start()]
+        end = buffer.find(b">", match.end())
+        if end < 0:
+            self._buffer = buffer[match.start():]
+            if self._eof:
+                self._done = True
+            else:
+                self._fill()
+            return
+        if buffer[end - 1:end] != b"/":
+            self._close = re.compile(rb"<(?:(!--|!\[CDATA\[|\?)|/" + re.escape(match.group(2)) + rb"\s*>)")
+        self._buffer = buffer[end + 1:]
+
+    def read(self, size=-1):
+        while not self._ready and not self._done:
+            self._step()
+        if size is None or size < 0:
+            while not self._done:
+                self._step()
+            size = len(self._ready)
+        data, self._ready = self._ready[:size], self._ready[size:]
+        return data
+
+    def readable(self):
+        return True
+
+
+def _iter_articles(source, backend=None, lazy=False, fields=None):
+    """
+    Streams an efetch XML document from a binary file object with iterparse,
+    yielding one Article per closing </article>. Each article is cleared
+    from the tree once parsed, so memory stays bounded by a single article
+    rather than the whole response.
+
+    With lazy, each Article keeps its own subtree until its heavy fields
+    are first read (see Article.lazy); it then holds the same values as an
+    eager parse. fields limits parsing to those Article keys (see
+    Article.fields). Projections without references cut <body> and <back>
+    out of the byte stream, so the parser never tokenizes them.
+    """
+    backend = _resolve_backend(backend)
+    try:
+        for parsed in _iter_records(source, backend, lazy, fields):
+            if parsed is not None:
+                yield parsed
+    except backend.ParseError:
+        print("Failed to parse XML response")
+
+
+def _iter_records(source, backend, lazy=False, fields=None):
+    # _iter_articles without the error handling: yields the parse of each
+    # top-level <article>, None for those without article-meta, and lets
+    # backend.ParseError through
+    fields = Article.fields(fields)
+    # Only projections without references may skip anything: a <ref> can
+    # sit in <body> as well as <back>
+    if not _wants(fields, "references"):
+        source = _ElementSkipper(source, ["body", "back"])
+    for article in backend.iter_articles(source, keep=lazy):
+        yield backend.parse_article(article, lazy, fields)
+
+
+def _commit_cached(response):
+    # Lets the client's cache keep a streamed body now that it has parsed
+    commit = getattr(response, "commit_cache", None)
+    if commit is not None:
+        commit()
+
+
+def _response_stream(response):
+    """
+    Returns a file object over the decoded body of a streamed response.
+    """
+    response.raw.decode_content = True
+    return response.raw
+
+
+def _stream_efetch(client, send, backend=None, lazy=False, fields=None, resume=False):
+    """
+    Yields the Articles of an efetch response, parsed as the body streams
+    in. send(done) makes the request, done being the number of records
+    read so far. Bodies are parsed as they arrive, so the client cannot
+    retry a transfer that breaks off midway, or a body cut short that no
+    longer parses: both are retried here, under the client's retry
+    policy. With resume, send asks the server to start after the records
+    already read (as retstart does); otherwise the response is sent whole
+    again and those records are skipped. Once retries run out, transfer
+    errors are raised and parse errors printed, ending the response.
+    """
+    backend = _resolve_backend(backend)
+    started = time.monotonic()
+    attempt = 0
+    done = 0
+    while True:
+        skip = 0 if resume else done
+        try:
+            with send(done) as response:
+                response.raise_for_status()
+                for index, parsed in enumerate(_iter_records(_response_stream(response), backend, lazy, fields)):
+                    if index < skip:
+                        continue
+                    done += 1
+                    if parsed is not None:
+                        yield parsed
+                _commit_cached(response)
+            return
+        except TRANSFER_ERRORS + (backend.ParseError,) as e:
+            delay = client.retry.next_delay(attempt, started, error=e)
+            if delay is None:
+                if isinstance(e, backend.ParseError):
+                    print("Failed to parse XML response")
+                    return
+                raise
+        time.sleep(delay)
+        attempt += 1
+
+
+def _efetch_post(url, params):
+    # True if the GET URL for params would be longer than EFETCH_POST_URL_LENGTH
+    return len(url) + 1 + len(urlencode(params)) > EFETCH_POST_URL_LENGTH
+
+
+def _fetch_articles(client, ids, backend=None, lazy=False, fields=None):
+    """
+    Fetches and parses one efetch batch, retried as in _stream_efetch.
+    Batches whose GET URL would be longer than EFETCH_POST_URL_LENGTH are
+    sent as a POST.
+    """
+    url = f"{BASE_URL}efetch.fcgi"
+    params = {
+        "db": "pmc",
+        "id": ",".join(ids),
+        "retmode": "xml"
+    }
+
+    post = _efetch_post(url, params)
+
+    def send(done):
+        if post:
+            # efetch is read-only, so the POST is safe to retry
+            return client.request("POST", url, data=params, stream=True, idempotent=True)
+        return client.get(url, params=params, stream=True)
+
+    return list(_stream_efetch(client, send, backend, lazy, fields))
+
+
+def _pmcid(uid):
+    # esearch returns bare numbers; OA requests and stored records use "PMC123"
+    uid = str(uid)
+    return uid if uid.startswith("PMC") else f"PMC{uid}"
+
+
+def iter_pmc_metadata(id_list, chunk_size=EFETCH_CHUNK_SIZE, max_workers=3, client=None, backend=None,
+                      lazy=False, fields=None):
+    """
+    Yields Articles (read-only Mappings, not dicts; see Article.to_dict)
+    for id_list (any iterable of PMC IDs), fetched in efetch batches of
+    chunk_size with up to max_workers batches in flight.
+    Articles are yielded as each batch completes, so results arrive in batch
+    completion order and at most max_workers batches are held in memory.
+    All requests still go through the client's rate limiter. backend is a
+    parser backend name or instance (see get_parser_backend).
+
+    lazy=True defers parsing abstract, authors and references until they
+    are first read; jobs that only list pmcid, title or dates skip most of
+    the parse work. Each lazy Article holds its XML subtree until then, so
+    this suits consumers that process and drop articles as they stream.
+
+    fields, e.g. ("pmcid", "title", "pub_date"), declares up front which
+    Article keys are needed; nothing else is parsed, and unless references
+    are wanted <body> and <back> are skipped in the stream. Articles then
+    only have those keys (pmcid is always included), with the same values
+    as a full parse.
+    """
+    client = client or get_default_client()
+    backend = _resolve_backend(backend)
+    fields = Article.fields(fields)
+    ids = iter(id_list)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        pending = set()
+        while True:
+            chunk = list(islice(ids, chunk_size))
+            if chunk:
+                pending.add(pool.submit(_fetch_articles, client, chunk, backend, lazy, fields))
+            if not pending:
+                break
+            if chunk and len(pending) < max_workers:
+                continue
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield from future.result()
+
+
+def get_pmc_metadata(id_list, client=None, chunk_size=EFETCH_CHUNK_SIZE, max_workers=3, backend=None, store=None,
+                     lazy=False, fields=None, as_dicts=True):
+    """
+    Takes a list of PMC IDs and fetches metadata including abstract, keywords, and references.
+    Uses efetch (XML) as esummary (JSON) does not provide this depth. 
+    Long lists are fetched in concurrent batches (see iter_pmc_metadata,
+    also for lazy and fields).
+
+    Returns a list of article dicts. as_dicts=False returns Article records
+    instead: read-only Mappings with the same keys that take far less
+    memory for large corpora (see Article). lazy needs as_dicts=False, as
+    building dicts parses every field anyway; ValueError otherwise.
+
+    With store (an ArticleStore), articles already stored are served from it
+    and only the misses are fetched; those are then saved to the store.
+    Results come in id_list order. The store needs whole records, so the
+    misses are parsed in full and lazy has no effect; fields applies to
+    stored and fetched articles alike.
+    """
+    if as_dicts:
+        if lazy:
+            raise ValueError("lazy=True needs as_dicts=False")
+        articles = get_pmc_metadata(id_list, client=client, chunk_size=chunk_size, max_workers=max_workers,
+                                    backend=backend, store=store, fields=fields, as_dicts=False)
+        return [article.to_dict() for article in articles]
+    if not id_list:
+        return []
+    if store is None:
+        return list(iter_pmc_metadata(id_list, chunk_size=chunk_size, max_workers=max_workers, client=client,
+                                      backend=backend, lazy=lazy, fields=fields))
+
+    # Stored records are keyed "PMC123" while esearch hands out "123"
+    uids = {_pmcid(uid): uid for uid in id_list}
+    hits = store.get_many(uids)
+    misses = [uid for pmcid, uid in uids.items() if pmcid not in hits]
+    # Storing needs every field, so fetched articles are never lazy or
+    # projected
+    fetched = list(iter_pmc_metadata(misses, chunk_size=chunk_size, max_workers=max_workers, client=client,
+                                     backend=backend)) if misses else []
+    store.put_many(fetched)
+    hits.update((article.pmcid, article) for article in fetched)
+    return [hits[pmcid].project(fields) for pmcid in uids if pmcid in hits]
+
+
+def _reference_row(ref):
+    authors = json.dumps([[a.surname, a.given_names] for a in ref.authors]) if ref.authors else None
+    return (ref.text, authors) + tuple(getattr(ref, name) for name in Reference.FIELDS)
+
+
+def _reference_from_row(row):
+    text, authors, *values = row
+    return Reference(text, [Author(*a) for a in json.loads(authors)] if authors else (), *values)
+
+
+class ArticleStore:
+    """
+    Parsed Articles persisted in SQLite at path (in WAL mode, so readers in
+    other processes are not blocked by a writer), with authors, keywords
+    and references in their own tables keyed by pmcid. Articles round-trip
+    unchanged through put_many and get_many; writes replace the stored
+    record. Safe to share between threads.
+
+    Reference identifiers (doi, pmid, pmcid) are indexed, so citing()
+    answers "who cites this work" with an exact lookup.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS articles (
+            pmcid TEXT PRIMARY KEY,
+            title TEXT,
+            journal TEXT,
+            pub_date TEXT,
+            pub_type TEXT,
+            abstract TEXT,
+            updated REAL,
+            pmid TEXT,
+            doi TEXT
+        );
+        CREATE TABLE IF NOT EXISTS authors (
+            pmcid TEXT, position INTEGER, surname TEXT, given_names TEXT, PRIMARY KEY (pmcid, position)
+        );
+        CREATE TABLE IF NOT EXISTS keywords (
+            pmcid TEXT, position INTEGER, keyword TEXT, PRIMARY KEY (pmcid, position)
+        );
+        CREATE TABLE IF NOT EXISTS "references" (
+            pmcid TEXT, position INTEGER, citation TEXT, authors TEXT, year TEXT, source TEXT, volume TEXT,
+            pages TEXT, doi TEXT, pmid TEXT, pmcid_cited TEXT, PRIMARY KEY (pmcid, position)
+        );
+        CREATE INDEX IF NOT EXISTS keywords_by_keyword ON keywords (keyword);
+        CREATE INDEX IF NOT EXISTS references_by_doi ON "references" (doi);
+        CREATE INDEX IF NOT EXISTS references_by_pmid ON "references" (pmid);
+        CREATE INDEX IF NOT EXISTS references_by_pmcid ON "references" (pmcid_cited);
+    """
+
+    # Article attribute -> (table, columns, item to row, row to item) for
+    # the tuple-valued fields
+    CHILDREN = {
+        "authors": ("authors", ("surname", "given_names"),
+                    lambda author: (author.surname, author.given_names), lambda row: Author(*row)),
+        "keywords": ("keywords", ("keyword",), lambda keyword: (keyword,), lambda row: row[0]),
+        "references": ('"references"', ("citation", "authors") + Reference.FIELDS[:-1] + ("pmcid_cited",),
+                       _reference_row, _reference_from_row),
+    }
+
+    # Keep IN (...) lists under SQLite's bound-parameter limit
+    QUERY_CHUNK = 500
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(self.SCHEMA)
+
+    def __contains__(self, pmcid):
+        return self.get(pmcid) is not None
+
+    def __len__(self):
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM articles").fetchone()[0]
+
+    def get(self, pmcid):
+        return self.get_many([pmcid]).get(_pmcid(pmcid))
+
+    def get_many(self, pmcids):
+        """
+        Returns {pmcid: Article} for the stored ones among pmcids, in the
+        order given. Bare numeric IDs are looked up as "PMC<id>".
+        """
+        keys = list(dict.fromkeys(_pmcid(pmcid) for pmcid in pmcids))
+        rows = {}
+        children = {}
+        with self._lock:
+            for start in range(0, len(keys), self.QUERY_CHUNK):
+                chunk = keys[start:start + self.QUERY_CHUNK]
+                marks = ",".join("?" * len(chunk))
+                for row in self._db.execute(
+                        "SELECT pmcid, title, journal, pub_date, pub_type, abstract, pmid, doi"
+                        f" FROM articles WHERE pmcid IN ({marks})", chunk):
+                    rows[row[0]] = row
+                    children[row[0]] = {attr: [] for attr in self.CHILDREN}
+                for attr, (table, columns, _, to_item) in self.CHILDREN.items():
+                    for pmcid, *values in self._db.execute(
+                            f"SELECT pmcid, {', '.join(columns)} FROM {table}"
+                            f" WHERE pmcid IN ({marks}) ORDER BY pmcid, position", chunk):
+                        children[pmcid][attr].append(to_item(values))
+        return {key: Article(*rows[key][:6], pmid=rows[key][6], doi=rows[key][7], **children[key])
+                for key in keys if key in rows}
+
+    def put_many(self, articles):
+        """
+        Inserts or replaces Articles (or article dicts) in one transaction.
+        Articles without a known pmcid are skipped. Returns how many were
+        written. Raises ValueError for projected Articles, which lack
+        fields a stored record must have.
+        """
+        articles = [a if isinstance(a, Article) else Article.from_dict(a) for a in articles]
+        if any(a.projected for a in articles):
+            raise ValueError("Projected Articles cannot be stored")
+        articles = [a for a in articles if a.pmcid != "Unknown"]
+        if not articles:
+            return 0
+        now = time.time()
+        keys = [(a.pmcid,) for a in articles]
+        with self._lock, self._db:
+            self._db.executemany(
+                "INSERT INTO articles (pmcid, title, journal, pub_date, pub_type, abstract, updated, pmid, doi)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)"
+                " ON CONFLICT (pmcid) DO UPDATE SET title = excluded.title, journal = excluded.journal,"
+                " pub_date = excluded.pub_date, pub_type = excluded.pub_type, abstract = excluded.abstract,"
+                " updated = excluded.updated, pmid = excluded.pmid, doi = excluded.doi",
+                [(a.pmcid, a.title, a.journal, a.pub_date, a.pub_type, a.abstract, now, a.pmid, a.doi)
+                 for a in articles])
+            for attr, (table, columns, to_row, _) in self.CHILDREN.items():
+                self._db.executemany(f"DELETE FROM {table} WHERE pmcid = ?", keys)
+                self._db.executemany(
+                    f"INSERT INTO {table} (pmcid, position, {', '.join(columns)})"
+                    f" VALUES (?, ?, {', '.join('?' * len(columns))})",
+                    [(a.pmcid, position, *to_row(item))
+                     for a in articles for position, item in enumerate(getattr(a, attr))])
+        return len(articles)
+
+    def citing(self, doi=None, pmid=None, pmcid=None):
+        """
+        Returns the PMCIDs of stored articles with a reference to the work
+        identified by doi, pmid or pmcid (any that match), sorted.
+        """
+        clauses, params = [], []
+        for column, value in (("doi", _normalize_doi(doi) if doi else None), ("pmid", pmid),
+                              ("pmcid_cited", _pmcid(pmcid) if pmcid else None)):
+            if value:
+                clauses.append(f"{column} = ?")
+                params.append(str(value))
+        if not clauses:
+            return []
+        with self._lock:
+            rows = self._db.execute(
+                f'SELECT DISTINCT pmcid FROM "references" WHERE {" OR ".join(clauses)} ORDER BY pmcid', params)
+            return [row[0] for row in rows]
+
+    def close(self):
+        self._db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def iter_pmc_metadata_from_history(history, page_size=200, client=None, backend=None, lazy=False, fields=None):
+    """
+    Yields Articles for a search stored with search_pmc_history,
+    fetching them from the history server in pages of page_size via
+    retstart/retmax. The full ID list is never materialized. lazy and
+    fields work as in iter_pmc_metadata. A page that breaks off is fetched
+    again from the first record not yet read (see _stream_efetch).
+    """
+    if not history:
+        return
+
+    client = client or get_default_client()
+    url = f"{BASE_URL}efetch.fcgi"
+
+    def send(retstart, done):
+        params = {
+            "db": "pmc",
+            "query_key": history["query_key"],
+            "WebEnv": history["webenv"],
+            "retstart": retstart + done,
+            "retmax": page_size - done,
+            "retmode": "xml"
+        }
+        return client.get(url, params=params, stream=True)
+
+    for retstart in range(0, history["count"], page_size):
+        yield from _stream_efetch(client, partial(send, retstart), backend, lazy, fields, resume=True)
+
+
+def _read_part_meta(meta_path, url):
+    # Checkpoint of a partial download, or None if absent or for another URL
+    try:
+        with open(meta_path, encoding="utf-8") as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return meta if meta.get("url") == url else None
+
+
+def _write_part_meta(meta_path, url, response, size):
+    etag = response.headers.get("ETag")
+    meta = {
+        "url": url,
+        "size": size,
+        # Weak ETags cannot validate a byte range
+        "etag": etag if etag and not etag.startswith("W/") else None,
+        "last_modified": response.headers.get("Last-Modified"),
+    }
+    with open(meta_path, "w", encoding="utf-8") as f:
+        json.dump(meta, f)
+
+
+def _content_range_start(response):
+    # First byte position of a 206 Content-Range header, or None
+    try:
+        spec = response.headers["Content-Range"].partition(" ")[2]
+        return int(spec.split("-")[0])
+    except (KeyError, ValueError):
+        return None
+
+
+def _sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _download_to_file(client, url, save_path, cached=None):
+    """
+    Streams url into save_path. Returns (bytes transferred, manifest entry)
+    for the file, or None if cached (the manifest entry of the copy already
+    on disk) is still current: its ETag/Last-Modified are sent as
+    If-None-Match/If-Modified-Since and the server answered 304.
+
+    Data goes to save_path + ".part", with the source URL, total size and
+    ETag/Last-Modified checkpointed in save_path + ".part.json". A transfer
+    that breaks off (in this call under the client's retry policy, or in an
+    earlier run) resumes from the end of the part file with a Range request
+    guarded by If-Range, so the server sends the rest only if the file is
+    unchanged and the whole file otherwise. The finished file is renamed
+    into place atomically. Holds one of the client's per-host slots while
+    transferring.
+    """
+    part_path = f"{save_path}.part"
+    meta_path = f"{part_path}.json"
+    started = time.monotonic()
+    attempt = 0
+    transferred = 0
+
+    while True:
+        meta = _read_part_meta(meta_path, url)
+        offset = os.path.getsize(part_path) if meta and os.path.exists(part_path) else 0
+        validator = meta and (meta["etag"] or meta["last_modified"])
+        # Ranges apply to the encoded body, so ask for it unencoded
+        headers = {"Accept-Encoding": "identity"}
+        if offset and validator:
+            headers["Range"] = f"bytes={offset}-"
+            headers["If-Range"] = validator
+        elif not offset and cached is not None:
+            if cached.get("etag"):
+                headers["If-None-Match"] = cached["etag"]
+            if cached.get("last_modified"):
+                headers["If-Modified-Since"] = cached["last_modified"]
+
+        try:
+            with client.host_slot(url), client.get(url, stream=True, throttle=False, headers=headers) as r:
+                if r.status_code == 416 and "Range" in headers:
+                    if meta["size"] == offset:
+                        break  # the part file already holds everything
+                    os.remove(part_path)  # stale checkpoint, start over
+                    continue
+
+                if r.status_code == 304 and cached is not None:
+                    return None
+
+                r.raise_for_status()
+                if r.status_code == 206:
+                    if _content_range_start(r) != offset:
+                        os.remove(part_path)
+                        continue
+                    mode = "ab"
+                else:
+                    mode = "wb"
+                    length = r.headers.get("Content-Length")
+                    _write_part_meta(meta_path, url, r, int(length) if length and length.isdigit() else None)
+
+                with open(part_path, mode) as f:
+                    for chunk in r.iter_content(chunk_size=8192):
+                        f.write(chunk)
+                        transferred += len(chunk)
+            break
+        except TRANSFER_ERRORS as e:
+            delay = client.retry.next_delay(attempt, started, error=e)
+            if delay is None:
+                raise
+        time.sleep(delay)
+        attempt += 1
+
+    meta = _read_part_meta(meta_path, url) or {"etag": None, "last_modified": None}
+    os.replace(part_path, save_path)
+    if os.path.exists(meta_path):
+        os.remove(meta_path)
+
+    entry = {
+        "url": url,
+        "size": os.path.getsize(save_path),
+        "sha256": _sha256(save_path),
+        "etag": meta["etag"],
+        "last_modified": meta["last_modified"],
+    }
+    return transferred, entry
+
+
+class _CountingReader:
+    """
+    File object wrapper counting and hashing the bytes read through it.
+    """
+
+    def __init__(self, raw):
+        self.raw = raw
+        self.count = 0
+        self.digest = hashlib.sha256()
+
+    def read(self, size=-1):
+        data = self.raw.read(size)
+        self.count += len(data)
+        self.digest.update(data)
+        return data
+
+
+class ExtractionPolicy:
+    """
+    Chooses which members of an OA package are written to disk; everything
+    else is skipped while the package streams past and never touches disk.
+
+    Each package yields at most one primary XML, saved as {pmcid}.nxml (a
+    .nxml beats a plain .xml), and one primary PDF, saved as {pmcid}.pdf.
+    primary_pdf picks the PDF: "first" in archive order, "largest", or a
+    glob pattern the preferred PDF's name matches (e.g. "*main*.pdf"; the
+    first PDF is kept if none match). Other members are kept under their
+    base name only if they match an include pattern. Members matching an
+    exclude pattern or larger than max_member_size bytes are always
+    skipped. Patterns are case-insensitive and matched against both the
+    base name and the full member path.
+
+    "largest" and glob choices may write a candidate PDF and later replace
+    it with a better one, since a stream cannot look ahead.
+    """
+
+    def __init__(self, include=(), exclude=(), max_member_size=None, primary_pdf="first"):
+        self.include = tuple(p.lower() for p in include)
+        self.exclude = tuple(p.lower() for p in exclude)
+        self.max_member_size = max_member_size
+        self.primary_pdf = primary_pdf
+
+    @staticmethod
+    def _matches(name, patterns):
+        lower = name.lower()
+        base = os.path.basename(lower)
+        return any(fnmatch(base, p) or fnmatch(lower, p) for p in patterns)
+
+    def _pdf_rank(self, name, size):
+        if self.primary_pdf == "first":
+            return 0
+        if self.primary_pdf == "largest":
+            return size
+        return 1 if self._matches(name, (self.primary_pdf.lower(),)) else 0
+
+    def target(self, name, size, pmcid, primaries):
+        """
+        Decides where a package member goes. Returns (file name, kind, rank)
+        or (None, None, None) to skip it. kind is "xml" or "pdf" for primary
+        candidates, which replace the current primary of that kind (rank in
+        primaries) only if they rank strictly higher.
+        """
+        if self._matches(name, self.exclude):
+            return None, None, None
+        if self.max_member_size is not None and size > self.max_member_size:
+            return None, None, None
+
+        lower = name.lower()
+        if lower.endswith(".nxml") or lower.endswith(".xml"):
+            rank = 1 if lower.endswith(".nxml") else 0
+            if "xml" not in primaries or rank > primaries["xml"]:
+                return f"{pmcid}.nxml", "xml", rank
+        elif lower.endswith(".pdf"):
+            rank = self._pdf_rank(name, size)
+            if "pdf" not in primaries or rank > primaries["pdf"]:
+                return f"{pmcid}.pdf", "pdf", rank
+
+        if self._matches(name, self.include):
+            return os.path.basename(name), None, None
+        return None, None, None
+
+
+DEFAULT_EXTRACTION_POLICY = ExtractionPolicy()
+
+
+def _extraction_policy(policy, figures):
+    # figures is shorthand for a policy that only adds include patterns
+    if policy is None:
+        return ExtractionPolicy(include=figures) if figures else DEFAULT_EXTRACTION_POLICY
+    return policy
+
+
+def _extract_members(fileobj, article_dir, pmcid, policy=DEFAULT_EXTRACTION_POLICY, log=print):
+    """
+    Reads an OA package from fileobj in a single sequential pass, writing
+    the members policy (an ExtractionPolicy) selects into article_dir under
+    their final names, each through a .part file renamed into place. Member
+    paths are never used as given, so an archive cannot write outside
+    article_dir. Returns the paths written.
+    """
+    written = {}
+    primaries = {}
+    # r|* reads the stream sequentially and detects the compression itself
+    with tarfile.open(fileobj=fileobj, mode="r|*") as tar:
+        for member in tar:
+            if not member.isfile():
+                continue
+            target, kind, rank = policy.target(member.name, member.size, pmcid, primaries)
+            if target is None:
+                continue
+
+            target_path = os.path.join(article_dir, target)
+            part_path = f"{target_path}.part"
+            with tar.extractfile(member) as src, open(part_path, "wb") as dst:
+                for block in iter(lambda: src.read(65536), b""):
+                    dst.write(block)
+            os.replace(part_path, target_path)
+            log(f"Extracted {os.path.basename(member.name)} as {target}")
+            if kind is not None:
+                primaries[kind] = rank
+            written[target] = target_path
+    return list(written.values())
+
+
+def _stream_extract_package(client, url, article_dir, pmcid, cached=None, policy=DEFAULT_EXTRACTION_POLICY,
+                            log=print):
+    """
+    Streams an OA package straight through tarfile in a single pass, without
+    writing the archive to disk. Only the members policy (an
+    ExtractionPolicy) selects are written out (see _extract_members);
+    everything else is skipped in the stream.
+
+    Returns (bytes transferred, manifest entry, paths of the written files),
+    or None if cached is still current (304). A transfer that breaks off is
+    restarted from the beginning under the client's retry policy: a gzip
+    stream cannot be resumed mid-way.
+    """
+    headers = {"Accept-Encoding": "identity"}
+    if cached is not None:
+        if cached.get("etag"):
+            headers["If-None-Match"] = cached["etag"]
+        if cached.get("last_modified"):
+            headers["If-Modified-Since"] = cached["last_modified"]
+
+    started = time.monotonic()
+    attempt = 0
+    while True:
+        try:
+            with client.host_slot(url), client.get(url, stream=True, throttle=False, headers=headers) as r:
+                if r.status_code == 304 and cached is not None:
+                    return None
+                r.raise_for_status()
+
+                reader = _CountingReader(_response_stream(r))
+                written = _extract_members(reader, article_dir, pmcid, policy, log)
+
+                etag = r.headers.get("ETag")
+                entry = {
+                    "url": url,
+                    "size": reader.count,
+                    "sha256": reader.digest.hexdigest(),
+                    "etag": etag if etag and not etag.startswith("W/") else None,
+                    "last_modified": r.headers.get("Last-Modified"),
+                }
+                return reader.count, entry, written
+        except TRANSFER_ERRORS as e:
+            delay = client.retry.next_delay(attempt, started, error=e)
+            if delay is None:
+                raise
+        time.sleep(delay)
+        attempt += 1
+
+
+def _oa_links(root):
+    """
+    Returns {format: href} for the <link> elements of an OA service record,
+    with ftp:// links rewritten to https://.
+    """
+    links = {}
+    for link in root.findall(".//link"):
+        fmt = link.get("format")
+        href = link.get("href")
+        if href:
+            if href.startswith("ftp://"):
+                href = href.replace("ftp://", "https://")
+            links[fmt] = href
+    return links
+
+
+def _lookup_oa_links(pmcid, client, backend):
+    """
+    Queries the OA service for one PMCID. Returns (links, None) on success
+    and (None, message) if the lookup failed or the article is not OA.
+    """
+    try:
+        response = client.get(OA_URL, params={"id": pmcid})
+        response.raise_for_status()
+    except requests.exceptions.RequestException as e:
+        return None, f"Error querying OA API for {pmcid}: {e}"
+
+    try:
+        root = backend.fromstring(response.content)
+    except backend.ParseError:
+        return None, f"Failed to parse OA XML for {pmcid}"
+
+    error = root.find(".//error")
+    if error is not None:
+        return None, f"OA API Error for {pmcid}: {error.get('code')} - {error.text}"
+
+    return _oa_links(root), None
+
+
+class _JsonStore:
+    """
+    Thread-safe dict kept in memory and, if path is given, loaded from and
+    saved to that JSON file. save() replaces the file atomically. A file
+    that cannot be read (say, corrupt) is reported and treated as empty.
+    """
+
+    def __init__(self, path=None):
+        self.path = path
+        self._data = {}
+        self._lock = threading.Lock()
+        self._saved = None
+        if path is not None and os.path.exists(path):
+            try:
+                with open(path, encoding="utf-8") as f:
+                    data = json.load(f)
+                if not isinstance(data, dict):
+                    raise ValueError("not a JSON object")
+                self._data = data
+            except (OSError, ValueError) as e:
+                print(f"Ignoring unreadable {path}: {e}")
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, key):
+        return self._data.get(key)
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = value
+
+    def update(self, items):
+        with self._lock:
+            self._data.update(items)
+
+    def save(self, min_interval=None):
+        """
+        Writes the store to path, unless min_interval is given and the last
+        save was less than that many seconds ago.
+        """
+        if self.path is None:
+            return
+        with self._lock:
+            now = time.monotonic()
+            if min_interval is not None and self._saved is not None and now - self._saved < min_interval:
+                return
+            # A temp file of its own, so concurrent saves never share one
+            directory, name = os.path.split(os.path.abspath(self.path))
+            fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f"{name}.", suffix=".tmp")
+            try:
+                with os.fdopen(fd, "w", encoding="utf-8") as f:
+                    json.dump(self._data, f)
+                os.replace(tmp_path, self.path)
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+            self._saved = now
+
+
+class OALinkCache(_JsonStore):
+    """
+    Resolved OA links keyed by PMCID, so bulk downloads can skip the OA
+    lookup entirely. Kept in memory and, if path is given, persisted there
+    as JSON by save(). Only successful lookups are cached: articles that are
+    not OA yet may become so later. Safe to share between threads.
+
+    update() takes (pmcid, links) pairs, e.g. from iter_oa_records.
+    """
+
+
+class DownloadManifest(_JsonStore):
+    """
+    Record of every file downloaded under save_dir, keyed by path relative
+    to it: {"url", "size", "sha256", "etag", "last_modified"}. OA package
+    entries also list the "files" extracted from them. Lets re-runs skip or
+    conditionally revalidate files that are already on disk.
+    """
+
+    FILENAME = "manifest.json"
+
+    def __init__(self, save_dir):
+        self.save_dir = save_dir
+        os.makedirs(save_dir, exist_ok=True)
+        super().__init__(os.path.join(save_dir, self.FILENAME))
+
+    @classmethod
+    def shared(cls, save_dir):
+        """
+        Returns the process-wide DownloadManifest of save_dir, loaded on
+        first use, so concurrent downloads into one directory record into
+        one manifest instead of overwriting each other's. Shared manifests
+        are saved again at exit.
+        """
+        key = os.path.realpath(save_dir)
+        with _shared_manifests_lock:
+            if key not in _shared_manifests:
+                if not _shared_manifests:
+                    atexit.register(_save_shared_manifests)
+                _shared_manifests[key] = cls(save_dir)
+            return _shared_manifests[key]
+
+    def key(self, path):
+        return os.path.relpath(path, self.save_dir).replace(os.sep, "/")
+
+    def current(self, path, url, verify=False):
+        """
+        Returns the entry for path if it was downloaded from url and the file
+        on disk still matches it (size, and the checksum if verify), else None.
+        """
+        entry = self.get(self.key(path))
+        if entry is None or entry["url"] != url:
+            return None
+        if "files" in entry:
+            # OA package: the archive is gone, the files extracted from it must remain
+            paths = [os.path.join(self.save_dir, name) for name in entry["files"]]
+            return entry if all(os.path.exists(p) for p in paths) else None
+        if not os.path.exists(path) or os.path.getsize(path) != entry["size"]:
+            return None
+        if verify and _sha256(path) != entry["sha256"]:
+            return None
+        return entry
+
+
+_shared_manifests = {}
+_shared_manifests_lock = threading.Lock()
+
+
+def _save_shared_manifests():
+    with _shared_manifests_lock:
+        manifests = list(_shared_manifests.values())
+    for manifest in manifests:
+        manifest.save()
+
+
+def _resolve_oa_batch(batch, client, backend, cache=None):
+    """
+    Resolves one batch of PMCIDs with a single OA service request, returning
+    {pmcid: (links, error)}. IDs missing from a batched answer are not OA.
+    If the answer cannot be a real batched one (nothing parsed, or only the
+    first ID answered) the remaining IDs fall back to per-ID lookups.
+    """
+    if len(batch) == 1:
+        results = {batch[0]: _lookup_oa_links(batch[0], client, backend)}
+    else:
+        records = {}
+        try:
+            response = client.get(OA_URL, params={"id": ",".join(batch)})
+            response.raise_for_status()
+            root = backend.fromstring(response.content)
+            records = {record.get("id"): _oa_links(record) for record in root.iter("record")}
+        except requests.exceptions.RequestException as e:
+            return {pmcid: (None, f"Error querying OA API for {pmcid}: {e}") for pmcid in batch}
+        except backend.ParseError:
+            pass
+
+        batched = len(records) > 1 or (records and batch[0] not in records)
+        results = {}
+        for pmcid in batch:
+            if pmcid in records:
+                results[pmcid] = (records[pmcid], None)
+            elif batched:
+                results[pmcid] = (None, f"OA API Error for {pmcid}: not in OA service response")
+            else:
+                results[pmcid] = _lookup_oa_links(pmcid, client, backend)
+
+    if cache is not None:
+        for pmcid, (links, error) in results.items():
+            if error is None:
+                cache.put(pmcid, links)
+    return results
+
+
+def resolve_oa_links(pmcids, cache=None, batch_size=OA_BATCH_SIZE, client=None, backend=None):
+    """
+    Resolves OA download links for many PMCIDs, batch_size IDs per OA
+    service request. IDs already in cache (an OALinkCache) cost no request,
+    and new results are added to it.
+    Returns {pmcid: (links, error)} where exactly one of the two is None.
+    """
+    client = client or get_default_client()
+    backend = _resolve_backend(backend)
+
+    results = {}
+    misses = []
+    for pmcid in dict.fromkeys(pmcids):
+        if cache is not None and pmcid in cache:
+            results[pmcid] = (cache.get(pmcid), None)
+        else:
+            misses.append(pmcid)
+
+    for start in range(0, len(misses), batch_size):
+        results.update(_resolve_oa_batch(misses[start:start + batch_size], client, backend, cache))
+    return results
+
+
+def iter_oa_records(from_date, until_date=None, fmt=None, client=None, backend=None):
+    """
+    Pages through the OA service's date-range listing (articles added or
+    updated between from_date and until_date, YYYY-MM-DD), following
+    resumption tokens. Yields (pmcid, links) for every record; fmt restricts
+    the listing to "pdf" or "tgz". Useful for filling an OALinkCache ahead
+    of a bulk download:
+
+        cache.update(iter_oa_records("2024-01-01", "2024-01-31"))
+    """
+    client = client or get_default_client()
+    backend = _resolve_backend(backend)
+
+    url = OA_URL
+    params = {"from": from_date}
+    if until_date is not None:
+        params["until"] = until_date
+    if fmt is not None:
+        params["format"] = fmt
+
+    while url:
+        response = client.get(url, params=params)
+        response.raise_for_status()
+        root = backend.fromstring(response.content)
+
+        error = root.find(".//error")
+        if error is not None:
+            print(f"OA API Error: {error.get('code')} - {error.text}")
+            return
+
+        for record in root.iter("record"):
+            yield record.get("id"), _oa_links(record)
+
+        # The next page is a ready-made URL carrying the resumption token
+        resumption = root.find(".//resumption/link")
+        url = resumption.get("href") if resumption is not None else None
+        params = None
+
+
+def _quiet(message):
+    pass
+
+
+def _new_report(pmcid):
+    return {"pmcid": pmcid, "success": False, "files": [], "skipped": [], "bytes": 0, "duration": 0.0,
+            "error": None}
+
+
+def _fetch_article_files(pmcid, links, save_dir, client, report, log=print, manifest=None,
+                         revalidate=True, verify=False, policy=DEFAULT_EXTRACTION_POLICY):
+    """
+    Downloads the direct PDF/XML links of one article, falling back to the
+    OA package, and records files, bytes and the last error in report.
+
+    Files that manifest (a DownloadManifest) shows are already on disk are
+    revalidated with a conditional request, or skipped outright if
+    revalidate is False; verify also checks their checksums. Unchanged
+    files are listed in report["skipped"]. policy (an ExtractionPolicy)
+    selects what is kept from an OA package.
+    """
+    article_dir = os.path.join(save_dir, pmcid)
+    os.makedirs(article_dir, exist_ok=True)
+
+    downloaded_something = False
+
+    def fetch(href, save_path):
+        # (bytes transferred, manifest entry), or None if the copy on disk is current
+        cached = manifest.current(save_path, href, verify) if manifest is not None else None
+        if cached is not None and not revalidate:
+            return None
+        return _download_to_file(client, href, save_path, cached)
+
+    # 1. Try Direct PDF/XML
+    if 'pdf' in links or 'xml' in links:
+        for fmt, ext in [('pdf', 'pdf'), ('xml', 'nxml')]:
+            if fmt in links:
+                href = links[fmt]
+                save_name = f"{pmcid}.{ext}"
+                save_path = os.path.join(article_dir, save_name)
+
+                log(f"Downloading {fmt.upper()} as {save_name}...")
+                try:
+                    result = fetch(href, save_path)
+                    if result is None:
+                        report["skipped"].append(save_path)
+                        log(f"{save_name} is up to date")
+                    else:
+                        transferred, entry = result
+                        report["bytes"] += transferred
+                        if manifest is not None:
+                            manifest.put(manifest.key(save_path), entry)
+                        log(f"Saved {save_name}")
+                    report["files"].append(save_path)
+                    downloaded_something = True
+                except Exception as e:
+                    report["error"] = f"Failed to download {href}: {e}"
+                    log(report["error"])
+
+    # 2. Fallback to TGZ, streamed and extracted in one pass
+    if not downloaded_something and 'tgz' in links:
+        href = links['tgz']
+        tgz_name = os.path.basename(href)
+        # The manifest tracks the package under the name it would have on disk
+        tgz_path = os.path.join(article_dir, tgz_name)
+
+        log(f"Downloading and extracting OA Package (TGZ): {tgz_name}...")
+        try:
+            cached = manifest.current(tgz_path, href, verify) if manifest is not None else None
+            if cached is not None and not revalidate:
+                result = None
+            else:
+                result = _stream_extract_package(client, href, article_dir, pmcid, cached, policy, log)
+
+            if result is None:
+                files = [os.path.join(save_dir, name) for name in cached["files"]]
+                report["skipped"].extend(files)
+                report["files"].extend(files)
+                log(f"{tgz_name} is up to date")
+            else:
+                transferred, entry, files = result
+                report["bytes"] += transferred
+                report["files"].extend(files)
+                if manifest is not None:
+                    # Record what the package produced; the archive itself is never stored
+                    entry["files"] = [manifest.key(f) for f in files]
+                    manifest.put(manifest.key(tgz_path), entry)
+            downloaded_something = True
+
+        except tarfile.TarError as e:
+            report["error"] = f"Failed to extract tarball: {e}"
+            log(report["error"])
+        except Exception as e:
+            report["error"] = f"Failed to download package {href}: {e}"
+            log(report["error"])
+
+    if not downloaded_something:
+        if report["error"] is None:
+            report["error"] = f"No accessible files found for {pmcid} (might not be Open Access)."
+        log(f"No accessible files found for {pmcid} (might not be Open Access).")
+    else:
+        report["success"] = True
+
+
+def _open_manifest(manifest, save_dir):
+    # manifest=True means the shared default manifest of save_dir
+    if manifest is True:
+        return DownloadManifest.shared(save_dir)
+    return manifest or None
+
+
+def download_article_files(pmcid, save_dir="downloads", client=None, backend=None, link_cache=None,
+                           manifest=True, revalidate=True, verify=False, figures=None,
+                           extraction_policy=None):
+    """
+    Uses the PMC Open Access Web Service to download PDF and XML files.
+    Renames them to {pmcid}.pdf and {pmcid}.nxml.
+    Links already in link_cache (an OALinkCache) skip the OA lookup.
+
+    Downloads are recorded in save_dir/manifest.json (or the DownloadManifest
+    passed as manifest; False disables it). Files already recorded there are
+    revalidated with a conditional request, or skipped without any request
+    if revalidate is False; verify=True also re-checks their checksums.
+    The manifest is loaded once per directory and shared by every call (see
+    DownloadManifest.shared), so calls may run on many threads; it is saved
+    at most every MANIFEST_SAVE_INTERVAL seconds and at exit. Save a
+    manifest passed in yourself once done.
+
+    OA packages are extracted while they stream in, keeping what
+    extraction_policy (an ExtractionPolicy) selects: by default the XML and
+    first PDF only. figures=("*.jpg",) is shorthand for a policy that also
+    keeps members matching those globs.
+    Returns the same per-article report dict as download_many.
+    """
+    client = client or get_default_client()
+    backend = _resolve_backend(backend)
+    manifest = _open_manifest(manifest, save_dir)
+    report = _new_report(pmcid)
+    started = time.monotonic()
+
+    if link_cache is not None and pmcid in link_cache:
+        links, error = link_cache.get(pmcid), None
+    else:
+        links, error = _resolve_oa_batch([pmcid], client, backend, link_cache)[pmcid]
+    if error is not None:
+        print(error)
+        report["error"] = error
+    else:
+        _fetch_article_files(pmcid, links, save_dir, client, report, manifest=manifest,
+                             revalidate=revalidate, verify=verify,
+                             policy=_extraction_policy(extraction_policy, figures))
+        if manifest is not None:
+            manifest.save(MANIFEST_SAVE_INTERVAL)
+
+    report["duration"] = time.monotonic() - started
+    return report
+
+
+def download_many(pmcids, save_dir="downloads", workers=8, lookup_workers=2, client=None, backend=None,
+                  link_cache=None, batch_size=OA_BATCH_SIZE, manifest=True, revalidate=True, verify=False,
+                  figures=None, extraction_policy=None):
+    """
+    Downloads the OA files of many articles. Links are resolved batch_size
+    PMCIDs per OA request on lookup_workers threads (they are rate limited
+    anyway), or taken from link_cache (an OALinkCache) without any request.
+    Each resolved article is handed straight to a pool of `workers` transfer
+    threads, so lookups and file transfers overlap. Transfers per host stay
+    within the client's pool size.
+
+    manifest, revalidate, verify, figures and extraction_policy work as in
+    download_article_files, so a re-sync of an overlapping corpus only
+    transfers new or changed files.
+
+    Returns one report dict per PMCID, in input order:
+    {"pmcid", "success", "files", "skipped", "bytes", "duration", "error"}.
+    Nothing is printed.
+    """
+    client = client or get_default_client()
+    backend = _resolve_backend(backend)
+    manifest = _open_manifest(manifest, save_dir)
+    pmcids = list(pmcids)
+    reports = {pmcid: _new_report(pmcid) for pmcid in pmcids}
+
+    def lookup(batch):
+        return time.monotonic(), _resolve_oa_batch(batch, client, backend, link_cache)
+
+    def transfer(pmcid, started, links):
+        report = reports[pmcid]
+        _fetch_article_files(pmcid, links, save_dir, client, report, log=_quiet, manifest=manifest,
+                             revalidate=revalidate, verify=verify,
+                             policy=_extraction_policy(extraction_policy, figures))
+        report["duration"] = time.monotonic() - started
+
+    with ThreadPoolExecutor(max_workers=lookup_workers) as lookups, \
+            ThreadPoolExecutor(max_workers=workers) as transfers:
+        pending = []
+        misses = []
+        for pmcid in reports:
+            if link_cache is not None and pmcid in link_cache:
+                pending.append(transfers.submit(transfer, pmcid, time.monotonic(), link_cache.get(pmcid)))
+            else:
+                misses.append(pmcid)
+
+        batches = [misses[start:start + batch_size] for start in range(0, len(misses), batch_size)]
+        for future in as_completed([lookups.submit(lookup, batch) for batch in batches]):
+            started, results = future.result()
+            for pmcid, (links, error) in results.items():
+                if error is not None:
+                    reports[pmcid]["error"] = error
+                    reports[pmcid]["duration"] = time.monotonic() - started
+                else:
+                    pending.append(transfers.submit(transfer, pmcid, started, links))
+        try:
+            for future in pending:
+                future.result()
+        finally:
+            if manifest is not None:
+                manifest.save()
+
+    return [reports[pmcid] for pmcid in pmcids]
+
+
+class SyncState(_JsonStore):
+    """
+    Per-term sync progress for sync_pmc, persisted as JSON at path:
+    {"maxdate": last synced day, "seen": {pmcid: day it was last synced},
+    "retry": {ID: failed attempts} for IDs whose metadata fetch came back
+    empty or whose download failed, "failed": PMCIDs given up on}. Call save()
+    after a sync to keep it.
+    """
+
+
+def _download_failed(report):
+    # Articles the OA service does not offer have nothing left to retry
+    error = report["error"]
+    return not report["success"] and not (error and error.startswith(("OA API Error", "No accessible files")))
+
+
+def sync_pmc(term, state, initial_days=15, save_dir=None, client=None, backend=None, max_workers=3, store=None,
+             max_attempts=SYNC_MAX_ATTEMPTS):
+    """
+    Fetches only what changed for term since its last sync recorded in state
+    (a SyncState). The search runs on modification date (datetype=mdat)
+    from the stored high-water mark to today, or over the last initial_days
+    on the first run, so both new and updated articles come back. Day
+    granularity makes every window overlap the last by its boundary day;
+    everything modified that day is fetched again, so an update made after
+    the previous run, later the same day, is not missed. The delta is
+    fetched with get_pmc_metadata, written to store (an ArticleStore) if
+    given, replacing stale records, and, if save_dir is given, downloaded
+    with download_many (whose manifest makes re-fetched files cheap).
+
+    IDs whose metadata fetch came back empty or whose download failed are
+    not marked synced; they are kept in the state's retry list and fetched
+    again by the next run, whatever its window, until max_attempts runs
+    have failed on them. They then move to the state's failed list (efetch
+    never returns withdrawn or suppressed articles) and are only fetched
+    again if a later search window finds them. Articles the OA service
+    does not offer count as downloaded. state is updated in memory; save
+    it. Returns {"mindate", "maxdate", "new", "changed", "failed",
+    "articles", "downloads"}, with new, changed and failed (given up on in
+    this run) as lists of PMCIDs (boundary-day re-fetches count as changed),
+    articles as Articles and downloads as download_many's reports (empty
+    without save_dir).
+    """
+    client = client or get_default_client()
+    entry = state.get(term) or {"maxdate": None, "seen": {}, "retry": {}, "failed": []}
+    seen = entry["seen"]
+    attempts = {_pmcid(uid): count for uid, count in entry["retry"].items()}
+
+    maxdate = datetime.now().strftime(DATE_FORMAT)
+    mindate = entry["maxdate"]
+    if mindate is None:
+        mindate = (datetime.now() - timedelta(days=initial_days)).strftime(DATE_FORMAT)
+
+    delta = {}
+    for uid in entry["retry"]:
+        delta[_pmcid(uid)] = uid
+    for uid in iter_backfill_ids(term, mindate, maxdate, max_workers=max_workers, client=client, datetype="mdat"):
+        delta[_pmcid(uid)] = uid
+    print(f"Syncing {term!r} from {mindate} to {maxdate}: {len(delta)} new or changed")
+
+    articles = get_pmc_metadata(list(delta.values()), client=client, max_workers=max_workers, backend=backend,
+                                as_dicts=False)
+    fetched = {article["pmcid"] for article in articles}
+    if store is not None:
+        store.put_many(articles)
+    downloads = []
+    failed = set()
+    if save_dir is not None and fetched:
+        downloads = download_many([pmcid for pmcid in delta if pmcid in fetched], save_dir, client=client,
+                                  backend=backend)
+        failed = {report["pmcid"] for report in downloads if _download_failed(report)}
+    synced = fetched - failed
+
+    retry = {}
+    given_up = []
+    for pmcid, uid in delta.items():
+        if pmcid in synced:
+            continue
+        count = attempts.get(pmcid, 0) + 1
+        if count >= max_attempts:
+            given_up.append(pmcid)
+        else:
+            retry[uid] = count
+    gone = set(given_up)
+    gone.update(_pmcid(uid) for uid in entry["failed"])
+
+    result = {
+        "mindate": mindate,
+        "maxdate": maxdate,
+        "new": [pmcid for pmcid in delta if pmcid in fetched and pmcid not in seen],
+        "changed": [pmcid for pmcid in delta if pmcid in fetched and pmcid in seen],
+        "failed": given_up,
+        "articles": articles,
+        "downloads": downloads,
+    }
+    seen.update((pmcid, maxdate) for pmcid in synced)
+    state.put(term, {
+        "maxdate": maxdate,
+        "seen": seen,
+        "retry": retry,
+        "failed": sorted(gone - synced),
+    })
+    return result
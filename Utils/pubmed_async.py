@@ -0,0 +1,374 @@
+"""
+asyncio versions of search_pmc, get_pmc_metadata and download_article_files,
+built on httpx so a single event loop can keep many efetch pages and OA
+downloads in flight. Parsing, rate limiting and retry rules are shared with
+Utils.pubmed. Clients built without a rate limiter, including the one each
+call makes when given no client, share the process-wide limiter (see
+get_shared_rate_limiter), so sync and async calls are paced as one.
+"""
+import asyncio
+from contextlib import asynccontextmanager
+from itertools import islice
+import io
+import os
+import tarfile
+import time
+
+try:
+    import httpx
+except ImportError:  # optional: only needed for the asyncio client
+    httpx = None
+
+from .pubmed import (
+    BASE_URL,
+    DEFAULT_TIMEOUT,
+    EFETCH_CHUNK_SIZE,
+    IDEMPOTENT_METHODS,
+    OA_URL,
+    RateLimiter,
+    RetryPolicy,
+    _default_date_range,
+    _efetch_post,
+    _extract_members,
+    _extraction_policy,
+    _iter_articles,
+    _oa_links,
+    _resolve_backend,
+    get_shared_rate_limiter,
+)
+
+
+class _AsyncStreamReader:
+    """
+    Blocking binary file object over an async byte iterator, for code
+    running in a worker thread while the event loop fetches the chunks.
+    Errors raised by the iterator surface from read().
+    """
+
+    def __init__(self, chunks, loop):
+        self._chunks = chunks
+        self._loop = loop
+        self._buffer = b""
+        self._eof = False
+
+    async def _next_chunk(self):
+        return await anext(self._chunks, b"")
+
+    def read(self, size=-1):
+        while not self._eof and (size is None or size < 0 or len(self._buffer) < size):
+            chunk = asyncio.run_coroutine_threadsafe(self._next_chunk(), self._loop).result()
+            if chunk:
+                self._buffer += chunk
+            else:
+                self._eof = True
+        if size is None or size < 0:
+            size = len(self._buffer)
+        data, self._buffer = self._buffer[:size], self._buffer[size:]
+        return data
+
+    def readable(self):
+        return True
+
+
+class AsyncNCBIClient:
+    """
+    asyncio counterpart of NCBIClient. Keeps one pooled httpx.AsyncClient
+    (max_connections open connections) and bounds concurrency with two
+    semaphores: max_requests E-utility/OA calls and max_downloads file
+    transfers in flight at once. Every NCBI call also waits on the rate
+    limiter: the shared one for api_key unless one is passed in.
+    """
+
+    def __init__(self, max_connections=10, max_requests=4, max_downloads=8, timeout=DEFAULT_TIMEOUT,
+                 api_key=None, rate_limiter=None, rate_limit_file=None, retry=None, http=None):
+        if httpx is None:
+            raise RuntimeError("httpx is required for the asyncio client")
+        connect, read = timeout
+        self.http = http if http is not None else httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+            timeout=httpx.Timeout(read, connect=connect),
+            follow_redirects=True,
+        )
+        self.api_key = api_key if api_key is not None else os.environ.get("NCBI_API_KEY")
+        if rate_limiter is None:
+            rate_limiter = (get_shared_rate_limiter(self.api_key) if rate_limit_file is None
+                            else RateLimiter.for_api_key(self.api_key, lock_path=rate_limit_file))
+        self.rate_limiter = rate_limiter
+        self.retry = retry if retry is not None else RetryPolicy()
+        self.request_slots = asyncio.Semaphore(max_requests)
+        self.download_slots = asyncio.Semaphore(max_downloads)
+
+    async def request(self, method, url, params=None, throttle=True, idempotent=None, **kwargs):
+        """
+        Sends a request and reads the whole response, retrying transient
+        failures like NCBIClient.request.
+        """
+        if idempotent is None:
+            idempotent = method.upper() in IDEMPOTENT_METHODS
+        if self.api_key and url.startswith(BASE_URL):
+            if method.upper() == "POST" and "data" in kwargs:
+                kwargs["data"] = dict(kwargs["data"] or {}, api_key=self.api_key)
+            else:
+                params = dict(params or {}, api_key=self.api_key)
+
+        started = time.monotonic()
+        attempt = 0
+        while True:
+            if throttle:
+                await asyncio.sleep(self.rate_limiter.reserve())
+            try:
+                async with self.request_slots:
+                    response = await self.http.request(method, url, params=params, **kwargs)
+            except httpx.TransportError as e:
+                delay = self.retry.next_delay(attempt, started, idempotent, error=e)
+                if delay is None:
+                    raise
+            else:
+                delay = self.retry.next_delay(attempt, started, idempotent, response=response)
+                if delay is None:
+                    return response
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    async def get(self, url, params=None, throttle=True, **kwargs):
+        return await self.request("GET", url, params=params, throttle=throttle, **kwargs)
+
+    async def download(self, url, save_path, chunk_size=65536):
+        """
+        Streams url into save_path, holding one download slot. Transient
+        failures restart the transfer under the retry policy; anything else
+        is raised.
+        """
+        started = time.monotonic()
+        attempt = 0
+        async with self.download_slots:
+            while True:
+                try:
+                    async with self.http.stream("GET", url) as r:
+                        delay = None
+                        if r.status_code in self.retry.statuses:
+                            delay = self.retry.next_delay(attempt, started, response=r)
+                        if delay is None:
+                            r.raise_for_status()
+                            with open(save_path, "wb") as f:
+                                async for chunk in r.aiter_bytes(chunk_size):
+                                    f.write(chunk)
+                            return
+                except httpx.TransportError as e:
+                    delay = self.retry.next_delay(attempt, started, error=e)
+                    if delay is None:
+                        raise
+                await asyncio.sleep(delay)
+                attempt += 1
+
+    async def extract_package(self, url, article_dir, pmcid, policy=None):
+        """
+        Streams the OA package at url through Utils.pubmed's member
+        selection in a worker thread, holding one download slot, so the
+        archive never touches disk and only what policy (an
+        ExtractionPolicy, by default the XML and first PDF) selects is
+        written. Returns the paths written. A transfer that breaks off is
+        restarted from the beginning under the retry policy.
+        """
+        policy = _extraction_policy(policy, None)
+        loop = asyncio.get_running_loop()
+        started = time.monotonic()
+        attempt = 0
+        async with self.download_slots:
+            while True:
+                try:
+                    async with self.http.stream("GET", url, headers={"Accept-Encoding": "identity"}) as r:
+                        delay = None
+                        if r.status_code in self.retry.statuses:
+                            delay = self.retry.next_delay(attempt, started, response=r)
+                        if delay is None:
+                            r.raise_for_status()
+                            reader = _AsyncStreamReader(r.aiter_raw(), loop)
+                            return await asyncio.to_thread(_extract_members, reader, article_dir, pmcid, policy)
+                except httpx.TransportError as e:
+                    delay = self.retry.next_delay(attempt, started, error=e)
+                    if delay is None:
+                        raise
+                await asyncio.sleep(delay)
+                attempt += 1
+
+    async def aclose(self):
+        await self.http.aclose()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.aclose()
+
+
+@asynccontextmanager
+async def _client_or_new(client):
+    # Use the caller's client, or one that lives for this call only
+    if client is not None:
+        yield client
+        return
+    async with AsyncNCBIClient() as client:
+        yield client
+
+
+async def search_pmc(term, max_results=5, mindate=None, maxdate=None, client=None, datetype="pdat"):
+    """
+    asyncio version of Utils.pubmed.search_pmc.
+    """
+    mindate, maxdate = _default_date_range(mindate, maxdate)
+    params = {
+        "db": "pmc",
+        "term": term,
+        "retmode": "json",
+        "retmax": max_results,
+        "datetype": datetype,
+        "mindate": mindate,
+        "maxdate": maxdate
+    }
+
+    async with _client_or_new(client) as client:
+        response = await client.get(f"{BASE_URL}esearch.fcgi", params=params)
+    response.raise_for_status()
+    data = response.json()
+
+    try:
+        id_list = data["esearchresult"]["idlist"]
+        print(f"Searching from {mindate} to {maxdate}...")
+        return id_list
+    except KeyError:
+        return []
+
+
+def _parse_content(content, backend, lazy, fields):
+    return list(_iter_articles(io.BytesIO(content), backend, lazy, fields))
+
+
+async def _fetch_articles(client, ids, backend, lazy=False, fields=None):
+    url = f"{BASE_URL}efetch.fcgi"
+    params = {
+        "db": "pmc",
+        "id": ",".join(ids),
+        "retmode": "xml"
+    }
+
+    if _efetch_post(url, params):
+        # efetch is read-only, so the POST is safe to retry
+        response = await client.request("POST", url, data=params, idempotent=True)
+    else:
+        response = await client.get(url, params=params)
+    response.raise_for_status()
+    # Parse off the event loop so other transfers keep moving
+    return await asyncio.to_thread(_parse_content, response.content, backend, lazy, fields)
+
+
+async def iter_pmc_metadata(id_list, chunk_size=EFETCH_CHUNK_SIZE, client=None, backend=None, lazy=False,
+                            fields=None, max_batches=3):
+    """
+    asyncio version of Utils.pubmed.iter_pmc_metadata: an async generator
+    yielding Articles as each efetch batch completes. Up to max_batches
+    batches are fetched concurrently (further bounded by the client's
+    max_requests and rate limiter); the next is only started once one has
+    been yielded, so memory stays bounded however long id_list is.
+    """
+    backend = _resolve_backend(backend)
+    ids = iter(id_list)
+
+    async with _client_or_new(client) as client:
+        pending = set()
+        try:
+            while True:
+                chunk = list(islice(ids, chunk_size))
+                if chunk:
+                    pending.add(asyncio.create_task(_fetch_articles(client, chunk, backend, lazy, fields)))
+                if not pending:
+                    break
+                if chunk and len(pending) < max_batches:
+                    continue
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    for article in task.result():
+                        yield article
+        finally:
+            for task in pending:
+                task.cancel()
+
+
+async def get_pmc_metadata(id_list, client=None, chunk_size=EFETCH_CHUNK_SIZE, backend=None, lazy=False,
+                           fields=None, max_batches=3, as_dicts=True):
+    """
+    asyncio version of Utils.pubmed.get_pmc_metadata: a list of article
+    dicts, or of Articles with as_dicts=False.
+    """
+    if as_dicts and lazy:
+        raise ValueError("lazy=True needs as_dicts=False")
+    if not id_list:
+        return []
+    articles = [article async for article in iter_pmc_metadata(id_list, chunk_size, client=client, backend=backend,
+                                                               lazy=lazy, fields=fields, max_batches=max_batches)]
+    return [article.to_dict() for article in articles] if as_dicts else articles
+
+
+async def download_article_files(pmcid, save_dir="downloads", client=None, backend=None, figures=None,
+                                 extraction_policy=None):
+    """
+    asyncio version of Utils.pubmed.download_article_files. Files are
+    streamed to disk; OA packages are extracted as they stream in, keeping
+    what extraction_policy (or figures, as there) selects.
+    """
+    async with _client_or_new(client) as client:
+        try:
+            response = await client.get(OA_URL, params={"id": pmcid})
+            response.raise_for_status()
+        except httpx.HTTPError as e:
+            print(f"Error querying OA API for {pmcid}: {e}")
+            return
+
+        backend = _resolve_backend(backend)
+        try:
+            root = backend.fromstring(response.content)
+        except backend.ParseError:
+            print(f"Failed to parse OA XML for {pmcid}")
+            return
+
+        error = root.find(".//error")
+        if error is not None:
+            print(f"OA API Error for {pmcid}: {error.get('code')} - {error.text}")
+            return
+
+        article_dir = os.path.join(save_dir, pmcid)
+        os.makedirs(article_dir, exist_ok=True)
+        links = _oa_links(root)
+
+        async def fetch(fmt, ext):
+            save_name = f"{pmcid}.{ext}"
+            print(f"Downloading {fmt.upper()} as {save_name}...")
+            try:
+                await client.download(links[fmt], os.path.join(article_dir, save_name))
+            except Exception as e:
+                print(f"Failed to download {links[fmt]}: {e}")
+                return False
+            print(f"Saved {save_name}")
+            return True
+
+        # 1. Try Direct PDF/XML, both transfers at once
+        direct = [fetch(fmt, ext) for fmt, ext in [('pdf', 'pdf'), ('xml', 'nxml')] if fmt in links]
+        downloaded_something = any(await asyncio.gather(*direct))
+
+        # 2. Fallback to TGZ
+        if not downloaded_something and 'tgz' in links:
+            href = links['tgz']
+            tgz_name = os.path.basename(href)
+
+            print(f"Downloading OA Package (TGZ): {tgz_name}...")
+            try:
+                written = await client.extract_package(href, article_dir, pmcid,
+                                                       _extraction_policy(extraction_policy, figures))
+                downloaded_something = bool(written)
+            except tarfile.TarError as e:
+                print(f"Failed to extract tarball: {e}")
+            except Exception as e:
+                print(f"Failed to download package {href}: {e}")
+
+    if not downloaded_something:
+        print(f"No accessible files found for {pmcid} (might not be Open Access).")
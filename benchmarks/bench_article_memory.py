@@ -0,0 +1,52 @@
+"""
+Memory held per parsed article: the original article dicts (references
+as flat text) against default-parsed Article records, which also carry
+each reference's structured fields, both kept alive in a list as a
+downstream scoring job would. Run from the repository root:
+
+    python benchmarks/bench_article_memory.py [n_articles] [refs]
+"""
+import gc
+import os
+import sys
+import tracemalloc
+import xml.etree.ElementTree as ET
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from Utils.pubmed import _parse_article, _parse_article_reference  # noqa: E402
+from pmc_fixture import make_article  # noqa: E402
+
+
+def retained(parse, elements):
+    """
+    Bytes still allocated after parsing every element and keeping the
+    results.
+    """
+    gc.collect()
+    tracemalloc.start()
+    results = [parse(element) for element in elements]
+    gc.collect()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return size, results
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    refs = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    # No body: only the retained records matter here, not parse cost
+    elements = [ET.fromstring(make_article(i, paragraphs=0, refs=refs)) for i in range(n)]
+
+    dict_size, dicts = retained(_parse_article_reference, elements)
+    slotted_size, articles = retained(_parse_article, elements)
+    if any(article != record for article, record in zip(articles, dicts)):
+        sys.exit("Article records disagree with the reference dicts")
+
+    print(f"fixture: {n} articles, {refs} references each")
+    print(f"dict     {dict_size / n:10.0f} bytes/article")
+    print(f"Article  {slotted_size / n:10.0f} bytes/article")
+    print(f"change   {slotted_size / dict_size - 1:+10.1%}")
+
+
+if __name__ == "__main__":
+    main()
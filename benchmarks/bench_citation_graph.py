@@ -0,0 +1,115 @@
+"""
+Build rate, retained memory and query latency of CitationGraph on a
+synthetic citation network (each article citing refs works drawn with a
+skew towards popular ones), against dicts of sets holding the same edges
+both ways, after checking that both agree. Run from the repository root:
+
+    python benchmarks/bench_citation_graph.py [n_articles] [refs]
+"""
+import gc
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from Utils.citation_graph import CitationGraph  # noqa: E402
+
+
+def make_citations(n, refs, seed=0):
+    # Half the cited works are harvested articles, half only have a PMID;
+    # squaring the draw skews citations towards low numbers
+    rng = random.Random(seed)
+    pool = 2 * n
+    for i in range(n):
+        cited = set()
+        for _ in range(refs):
+            work = int(rng.random() ** 2 * pool)
+            cited.add(f"PMC{work}" if work < n else f"pmid:{work}")
+        yield f"PMC{i}", sorted(cited)
+
+
+def build_graph(citations):
+    graph = CitationGraph()
+    for pmcid, cited in citations:
+        graph.add_citations(pmcid, cited)
+    graph.edge_count  # merge what is still pending
+    return graph
+
+
+def build_dicts(citations):
+    cites, cited_by = {}, {}
+    for pmcid, cited in citations:
+        cites[pmcid] = set(cited)
+        for work in cited:
+            cited_by.setdefault(work, set()).add(pmcid)
+    return cites, cited_by
+
+
+def build_time(build, citations):
+    start = time.perf_counter()
+    result = build(citations)
+    return result, time.perf_counter() - start
+
+
+def retained(build, citations):
+    # A separate build, as tracing allocations distorts the timing
+    gc.collect()
+    tracemalloc.start()
+    result = build(citations)
+    gc.collect()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return size
+
+
+def timed(label, fn, repeat=5):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    print(f"{label:<22} {best * 1000:10.3f} ms")
+    return result
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    refs = int(sys.argv[2]) if len(sys.argv) > 2 else 30
+    citations = list(make_citations(n, refs))
+
+    graph, graph_time = build_time(build_graph, citations)
+    (cites, cited_by), dict_time = build_time(build_dicts, citations)
+    graph_size = retained(build_graph, citations)
+    dict_size = retained(build_dicts, citations)
+    edges = graph.edge_count
+    sample = [pmcid for pmcid, _ in citations[::max(1, n // 200)]]
+    if any(set(graph.cites(pmcid)) != cites[pmcid] for pmcid in sample):
+        sys.exit("graph disagrees with the dicts on cites")
+    if any(set(graph.cited_by(pmcid)) != cited_by.get(pmcid, set()) for pmcid in sample):
+        sys.exit("graph disagrees with the dicts on cited_by")
+
+    print(f"fixture: {n} articles, {len(graph)} nodes, {edges} edges")
+    print(f"dict of sets  build {edges / dict_time:10.0f} edges/s  {dict_size / edges:6.1f} bytes/edge")
+    print(f"CitationGraph build {edges / graph_time:10.0f} edges/s  {graph_size / edges:6.1f} bytes/edge")
+
+    hub = "PMC0"
+    timed("in_degree", lambda: graph.in_degree(hub), repeat=1000)
+    timed("out_degree", lambda: graph.out_degree(sample[-1]), repeat=1000)
+    timed("2-hop out", lambda: graph.neighbours(sample[-1], hops=2))
+    timed("co_cited (hub)", lambda: graph.co_cited(hub))
+    timed("co_citation (pair)", lambda: graph.co_citation(hub, "PMC1"))
+
+    with tempfile.TemporaryDirectory() as path:
+        graph.path = path
+        timed("save", graph.save, repeat=1)
+        loaded = timed("load", lambda: CitationGraph(path), repeat=1)
+        if loaded.edge_count != edges or loaded.cites(hub) != graph.cites(hub):
+            sys.exit("reloaded graph differs")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""
+Streaming-parse throughput of a full parse against a field projection
+(fields=("pmcid", "title", "pub_date"), as a listing or dedup job would
+ask for), on each available parser backend, after checking that the
+projected articles match the full ones on those fields. Run from the
+repository root:
+
+    python benchmarks/bench_field_projection.py [n_articles] [paragraphs]
+"""
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from Utils.pubmed import _iter_articles, get_parser_backend, lxml_etree  # noqa: E402
+from pmc_fixture import make_article  # noqa: E402
+
+FIELDS = ("pmcid", "title", "pub_date")
+
+
+def run(backend, document, fields=None):
+    return list(_iter_articles(io.BytesIO(document), backend, fields=fields))
+
+
+def measure(label, backend, document, n, fields=None, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run(backend, document, fields)
+        best = min(best, time.perf_counter() - start)
+    print(f"{label:<16} {n / best:10.1f} articles/s")
+    return best
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    paragraphs = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+    document = ("<pmc-articleset>" + "".join(make_article(i, paragraphs=paragraphs) for i in range(n))
+                + "</pmc-articleset>").encode()
+
+    names = ["etree"] + (["lxml"] if lxml_etree is not None else [])
+    for name in names:
+        backend = get_parser_backend(name)
+        full, projected = run(backend, document), run(backend, document, FIELDS)
+        if [{key: a[key] for key in FIELDS} for a in full] != [dict(a) for a in projected]:
+            sys.exit(f"{name}: projected articles disagree with the full parse")
+
+        baseline = measure(f"{name} full", backend, document, n)
+        fast = measure(f"{name} projected", backend, document, n, FIELDS)
+        print(f"speedup          {baseline / fast:10.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""
+Peak memory of parsing a large efetch document: the old whole-document
+ET.fromstring approach against the streaming iterparse parser. Run from the
+repository root:
+
+    python benchmarks/bench_parse_memory.py [n_articles] [paragraphs]
+"""
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+import xml.etree.ElementTree as ET
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from Utils.pubmed import _iter_articles, _parse_article  # noqa: E402
+from pmc_fixture import write_articleset  # noqa: E402
+
+
+def parse_whole(path):
+    with open(path, "rb") as f:
+        content = f.read()
+    root = ET.fromstring(content)
+    return sum(1 for article in root.findall(".//article") if _parse_article(article) is not None)
+
+
+def parse_stream(path):
+    with open(path, "rb") as f:
+        # ElementTree backend: tracemalloc cannot see allocations made inside lxml
+        return sum(1 for _ in _iter_articles(f, "etree"))
+
+
+def measure(label, parse, path):
+    tracemalloc.start()
+    start = time.perf_counter()
+    count = parse(path)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<10} {count} articles  peak {peak / 2**20:8.1f} MiB  {elapsed:6.2f}s")
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    paragraphs = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "articleset.xml")
+        write_articleset(path, n, paragraphs=paragraphs)
+        print(f"fixture: {n} articles, {os.path.getsize(path) / 2**20:.1f} MiB")
+        measure("fromstring", parse_whole, path)
+        measure("iterparse", parse_stream, path)
+
+
+if __name__ == "__main__":
+    main()
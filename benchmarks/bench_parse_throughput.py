@@ -0,0 +1,52 @@
+"""
+Articles/sec of the article extractor against the original per-field
+implementation, after checking that both produce identical output, and of
+a lazy parse that leaves abstract, authors and references unread (as a
+listing job would). Unlike the original, the extractor also parses each
+citation into its structured Reference fields. Run from the repository
+root:
+
+    python benchmarks/bench_parse_throughput.py [n_articles] [paragraphs]
+"""
+import os
+import sys
+import time
+from functools import partial
+import xml.etree.ElementTree as ET
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from Utils.pubmed import _parse_article, _parse_article_reference  # noqa: E402
+from pmc_fixture import make_article  # noqa: E402
+
+
+def measure(label, parse, articles, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for article in articles:
+            parse(article)
+        best = min(best, time.perf_counter() - start)
+    print(f"{label:<18} {len(articles) / best:10.1f} articles/s")
+    return best
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    paragraphs = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+    document = "<pmc-articleset>" + "".join(make_article(i, paragraphs=paragraphs) for i in range(n)) + "</pmc-articleset>"
+    articles = ET.fromstring(document).findall(".//article")
+
+    mismatches = sum(_parse_article(a) != _parse_article_reference(a) for a in articles)
+    mismatches += sum(_parse_article(a, lazy=True) != _parse_article_reference(a) for a in articles)
+    if mismatches:
+        sys.exit(f"{mismatches} articles differ between extractors")
+
+    reference = measure("per-field", _parse_article_reference, articles)
+    scoped = measure("scoped", _parse_article, articles)
+    lazy = measure("lazy", partial(_parse_article, lazy=True), articles)
+    print(f"speedup            {reference / scoped:10.2f}x")
+    print(f"lazy speedup       {reference / lazy:10.2f}x")
+
+
+if __name__ == "__main__":
+    main()
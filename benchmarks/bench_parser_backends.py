@@ -0,0 +1,48 @@
+"""
+Streaming-parse throughput of the ElementTree and lxml backends on the same
+efetch document, after checking that both produce identical articles.
+Requires lxml. Run from the repository root:
+
+    python benchmarks/bench_parser_backends.py [n_articles] [paragraphs]
+"""
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from Utils.pubmed import _iter_articles, get_parser_backend  # noqa: E402
+from pmc_fixture import make_article  # noqa: E402
+
+
+def run(backend, document):
+    return list(_iter_articles(io.BytesIO(document), backend))
+
+
+def measure(label, backend, document, n, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run(backend, document)
+        best = min(best, time.perf_counter() - start)
+    print(f"{label:<6} {n / best:10.1f} articles/s")
+    return best
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    paragraphs = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+    document = ("<pmc-articleset>" + "".join(make_article(i, paragraphs=paragraphs) for i in range(n))
+                + "</pmc-articleset>").encode()
+
+    etree, lxml = get_parser_backend("etree"), get_parser_backend("lxml")
+    if run(etree, document) != run(lxml, document):
+        sys.exit("etree and lxml backends disagree")
+
+    baseline = measure("etree", etree, document, n)
+    fast = measure("lxml", lxml, document, n)
+    print(f"speedup {baseline / fast:9.2f}x")
+
+
+if __name__ == "__main__":
+    main()
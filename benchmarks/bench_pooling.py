@@ -0,0 +1,66 @@
+"""
+Compares requests/sec against a local stub server with and without the
+pooled NCBIClient. Run from the repository root:
+
+    python benchmarks/bench_pooling.py [n_requests]
+"""
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from Utils.pubmed import NCBIClient, RateLimiter  # noqa: E402
+
+BODY = b'{"esearchresult": {"count": "1", "idlist": ["123456"]}}'
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    # HTTP/1.1 so the server honours keep-alive
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out in separate writes; without this Nagle plus
+    # delayed ACK stalls every keep-alive response by ~40ms
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(BODY)))
+        self.end_headers()
+        self.wfile.write(BODY)
+
+    def log_message(self, *args):
+        pass
+
+
+def run(label, get, url, n):
+    start = time.perf_counter()
+    for _ in range(n):
+        response = get(url, params={"db": "pmc", "term": "cancer"})
+        response.raise_for_status()
+        response.content
+    elapsed = time.perf_counter() - start
+    print(f"{label:<12} {n / elapsed:10.1f} req/s")
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/esearch.fcgi"
+
+    try:
+        run("unpooled", requests.get, url, n)
+        # Unpaced, so the comparison measures connection reuse, not NCBI's
+        # rate limit
+        with NCBIClient(rate_limiter=RateLimiter(float("inf"))) as client:
+            run("pooled", client.get, url, n)
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""
+Generates synthetic efetch (pmc-articleset) XML shaped like full-text PMC
+articles, for the parsing benchmarks. Body and reference-list sizes are
+configurable so documents can be scaled up to realistic full-text sizes.
+"""
+import random
+
+WORDS = ("cell tumor protein expression patients analysis clinical response "
+         "signal pathway model data cohort risk treatment outcome gene").split()
+
+
+def _sentence(rng, n=20):
+    return " ".join(rng.choice(WORDS) for _ in range(n))
+
+
+def make_article(i, paragraphs=100, refs=50, authors=6, seed=0):
+    rng = random.Random(seed + i)
+    contribs = "".join(
+        f'<contrib contrib-type="author"><name><surname>Surname{a}</surname>'
+        f'<given-names>G{a}</given-names></name><xref ref-type="aff" rid="aff1">1</xref></contrib>'
+        for a in range(authors)
+    )
+    kwds = "".join(f"<kwd>{rng.choice(WORDS)}</kwd>" for _ in range(5))
+    sections = "".join(
+        f'<sec id="s{p}"><title>Section {p}</title><p>{_sentence(rng, 80)} '
+        f'<xref ref-type="bibr" rid="r{p % max(refs, 1)}">{p}</xref> <italic>{_sentence(rng, 5)}</italic> '
+        f'{_sentence(rng, 60)}</p></sec>'
+        for p in range(paragraphs)
+    )
+    ref_list = "".join(
+        f'<ref id="r{r}"><element-citation publication-type="journal"><person-group person-group-type="author">'
+        f'<name><surname>Author{r}</surname><given-names>A</given-names></name>'
+        f'<name><surname>Other{r}</surname><given-names>B</given-names></name></person-group>'
+        f'<article-title>{_sentence(rng, 10)}</article-title><source>Journal {r % 7}</source>'
+        f'<year>{2000 + r % 20}</year><volume>{r}</volume><fpage>{r * 10}</fpage><lpage>{r * 10 + 9}</lpage>'
+        f'<pub-id pub-id-type="doi">10.1000/test.{i}.{r}</pub-id><pub-id pub-id-type="pmid">{1000000 + r}</pub-id>'
+        f'</element-citation></ref>'
+        for r in range(refs)
+    )
+    return (
+        f'<article article-type="research-article"><front>'
+        f'<journal-meta><journal-title-group><journal-title>Journal of Testing</journal-title></journal-title-group></journal-meta>'
+        f'<article-meta><article-id pub-id-type="pmid">{30000000 + i}</article-id>'
+        f'<article-id pub-id-type="pmcid">PMC{100000 + i}</article-id>'
+        f'<title-group><article-title>Article {i}: <italic>{_sentence(rng, 8)}</italic></article-title></title-group>'
+        f'<contrib-group>{contribs}</contrib-group>'
+        f'<pub-date pub-type="epub"><day>{1 + i % 28}</day><month>{1 + i % 12}</month><year>2024</year></pub-date>'
+        f'<abstract><sec><title>Background</title><p>{_sentence(rng, 60)}</p></sec>'
+        f'<sec><title>Results</title><p>{_sentence(rng, 60)}</p></sec></abstract>'
+        f'<kwd-group>{kwds}</kwd-group></article-meta></front>'
+        f'<body>{sections}</body><back><ref-list>{ref_list}</ref-list></back></article>'
+    )
+
+
+def write_articleset(path, n, **kwargs):
+    """
+    Writes an n-article pmc-articleset document to path, one article at a time.
+    """
+    with open(path, "w", encoding="utf-8") as f:
+        f.write('<?xml version="1.0" encoding="UTF-8"?>\n<pmc-articleset>')
+        for i in range(n):
+            f.write(make_article(i, **kwargs))
+        f.write("</pmc-articleset>")
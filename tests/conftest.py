@@ -0,0 +1,28 @@
+"""
+Fixtures shared by the client, download and sync tests.
+"""
+import pytest
+
+from Utils.pubmed import NCBIClient, RateLimiter, RetryPolicy
+from stubs import StubSession
+
+
+@pytest.fixture
+def stub_client():
+    """
+    Factory of NCBIClients on a StubSession(handler), with no rate limit
+    pacing and retries that never sleep. client.session.calls lists what
+    was sent.
+    """
+    clients = []
+
+    def make(handler, **kwargs):
+        kwargs.setdefault("rate_limiter", RateLimiter(1e6, capacity=1e6))
+        kwargs.setdefault("retry", RetryPolicy(backoff_base=0))
+        client = NCBIClient(session=StubSession(handler), **kwargs)
+        clients.append(client)
+        return client
+
+    yield make
+    for client in clients:
+        client.close()
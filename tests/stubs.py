@@ -0,0 +1,52 @@
+"""
+Stand-ins for the network: a requests.Session answering from a handler,
+and responses over real urllib3 bodies.
+"""
+import io
+
+import requests
+import urllib3
+
+
+class StubSession(requests.Session):
+    """
+    Session answering every request with handler(call), call being a dict
+    of its method, url, params, data and headers. Calls are kept in order.
+    """
+
+    def __init__(self, handler):
+        super().__init__()
+        self.handler = handler
+        self.calls = []
+
+    def request(self, method, url, params=None, data=None, headers=None, stream=False, **kwargs):
+        call = {"method": method, "url": url, "params": params, "data": data, "headers": dict(headers or {})}
+        self.calls.append(call)
+        return self.handler(call)
+
+
+class CutOffBody(io.BytesIO):
+    """
+    Body whose connection drops once its bytes have been read.
+    """
+
+    def read(self, size=-1):
+        data = super().read(size)
+        if not data:
+            raise urllib3.exceptions.ProtocolError("Connection broken: stub cut off")
+        return data
+
+
+def make_response(status=200, body=b"", headers=None, url="https://stub.test/"):
+    """
+    A requests.Response over a real urllib3 body, readable streamed or not.
+    body may be bytes or a file object such as CutOffBody.
+    """
+    fp = io.BytesIO(body) if isinstance(body, bytes) else body
+    response = requests.Response()
+    response.status_code = status
+    response.url = url
+    response.raw = urllib3.HTTPResponse(body=fp, headers=headers or {}, status=status, preload_content=False)
+    response.headers = requests.structures.CaseInsensitiveDict(headers or {})
+    response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+    return response
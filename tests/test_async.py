@@ -0,0 +1,155 @@
+"""
+The asyncio client on a stubbed httpx transport: retries, efetch batches,
+file downloads and OA package extraction.
+"""
+import asyncio
+import io
+import json
+import tarfile
+from urllib.parse import parse_qs
+
+import pytest
+
+httpx = pytest.importorskip("httpx")
+
+from Utils.pubmed import BASE_URL, ExtractionPolicy, RateLimiter, RetryPolicy  # noqa: E402
+from Utils.pubmed_async import AsyncNCBIClient, get_pmc_metadata, search_pmc  # noqa: E402
+
+
+def _run(handler, test, **kwargs):
+    """
+    Runs test(client) on an AsyncNCBIClient whose requests handler(request)
+    answers, with no rate limit pacing and retries that never sleep.
+    Returns the requests sent.
+    """
+    sent = []
+
+    def record(request):
+        sent.append(request)
+        return handler(request)
+
+    async def main():
+        http = httpx.AsyncClient(transport=httpx.MockTransport(record))
+        kwargs.setdefault("rate_limiter", RateLimiter(1e6, capacity=1e6))
+        kwargs.setdefault("retry", RetryPolicy(backoff_base=0))
+        async with AsyncNCBIClient(http=http, **kwargs) as client:
+            await test(client)
+
+    asyncio.run(main())
+    return sent
+
+
+def _ids(request):
+    # efetch IDs, from the query string or the POSTed form
+    form = parse_qs(request.content.decode()) if request.method == "POST" else {}
+    return (form.get("id") or [request.url.params["id"]])[0].split(",")
+
+
+def _efetch(request):
+    articles = "".join(
+        f'<article><front><article-meta><article-id pub-id-type="pmcid">PMC{uid}</article-id>'
+        f"<title-group><article-title>Article {uid}</article-title></title-group></article-meta></front></article>"
+        for uid in _ids(request))
+    return httpx.Response(200, content=f"<pmc-articleset>{articles}</pmc-articleset>".encode())
+
+
+def test_async_request_retries_busy_answers():
+    answers = iter([httpx.Response(503, headers={"Retry-After": "0"}), httpx.Response(200, content=b"ok")])
+    results = []
+
+    async def test(client):
+        results.append(await client.get("https://stub.test/file"))
+
+    sent = _run(lambda request: next(answers), test)
+    assert results[0].content == b"ok"
+    assert len(sent) == 2
+
+
+def test_async_request_adds_api_key_to_ncbi_calls():
+    async def test(client):
+        await client.get(f"{BASE_URL}esearch.fcgi", params={"term": "x"})
+        await client.get("https://stub.test/file")
+
+    ncbi, other = _run(lambda request: httpx.Response(200, content=b"{}"), test, api_key="secret")
+    assert ncbi.url.params["api_key"] == "secret"
+    assert "api_key" not in other.url.params
+
+
+def test_async_search_pmc():
+    body = json.dumps({"esearchresult": {"idlist": ["1", "2"]}}).encode()
+    results = []
+
+    async def test(client):
+        results.append(await search_pmc("x", mindate="2024/01/01", maxdate="2024/01/31", client=client))
+
+    sent = _run(lambda request: httpx.Response(200, content=body), test)
+    assert results == [["1", "2"]]
+    assert sent[0].url.params["mindate"] == "2024/01/01"
+
+
+def test_async_get_pmc_metadata_batches():
+    results = []
+
+    async def test(client):
+        results.append(await get_pmc_metadata(["1", "2", "3"], client=client, chunk_size=1, max_batches=2))
+        results.append(await get_pmc_metadata(["4"], client=client, fields=("title",), as_dicts=False))
+
+    sent = _run(_efetch, test)
+    assert sorted(article["pmcid"] for article in results[0]) == ["PMC1", "PMC2", "PMC3"]
+    assert isinstance(results[0][0], dict)
+    assert dict(results[1][0]) == {"pmcid": "PMC4", "title": "Article 4"}
+    assert len(sent) == 4
+
+
+def test_async_get_pmc_metadata_posts_long_batches():
+    ids = [str(30000000 + n) for n in range(300)]
+    results = []
+
+    async def test(client):
+        results.append(await get_pmc_metadata(ids, client=client, chunk_size=300))
+
+    sent = _run(_efetch, test)
+    assert [request.method for request in sent] == ["POST"]
+    assert len(results[0]) == 300
+
+
+def test_async_get_pmc_metadata_rejects_lazy_dicts():
+    with pytest.raises(ValueError):
+        asyncio.run(get_pmc_metadata(["1"], lazy=True))
+
+
+def test_async_download_retries_and_writes_file(tmp_path):
+    answers = iter([httpx.Response(503), httpx.Response(200, content=b"%PDF-1.7")])
+    save_path = tmp_path / "PMC1.pdf"
+
+    async def test(client):
+        await client.download("https://stub.test/PMC1.pdf", str(save_path))
+
+    sent = _run(lambda request: next(answers), test)
+    assert save_path.read_bytes() == b"%PDF-1.7"
+    assert len(sent) == 2
+
+
+def test_async_extract_package_applies_policy(tmp_path):
+    data = io.BytesIO()
+    with tarfile.open(fileobj=data, mode="w:gz") as tar:
+        for name, content in [("PMC1/article.nxml", b"<article/>"), ("PMC1/article.pdf", b"%PDF"),
+                              ("PMC1/fig1.jpg", b"jpeg"), ("PMC1/table.csv", b"a,b")]:
+            info = tarfile.TarInfo(name)
+            info.size = len(content)
+            tar.addfile(info, io.BytesIO(content))
+    package = data.getvalue()
+    written = []
+
+    async def test(client):
+        written.extend(await client.extract_package("https://stub.test/PMC1.tar.gz", str(tmp_path), "PMC1",
+                                                    ExtractionPolicy(include=["*.jpg"])))
+
+    async def chunks():
+        # Streamed in pieces, as from the network
+        for start in range(0, len(package), 64):
+            yield package[start:start + 64]
+
+    _run(lambda request: httpx.Response(200, content=chunks()), test)
+    assert sorted(path.rsplit("/", 1)[-1] for path in written) == ["PMC1.nxml", "PMC1.pdf", "fig1.jpg"]
+    assert (tmp_path / "PMC1.nxml").read_bytes() == b"<article/>"
@@ -0,0 +1,64 @@
+"""
+CitationGraph joins harvested articles to the works citing them, and a
+save cut short keeps the last complete one.
+"""
+import json
+import os
+
+import pytest
+
+from Utils.citation_graph import CitationGraph
+from Utils.pubmed import Article, Reference
+
+
+def _article(pmcid, references, pmid=None, doi=None):
+    return Article(pmcid, "Title", "J Test", "2020-01-01", "research-article", "Abstract", references=references,
+                   pmid=pmid, doi=doi)
+
+
+def _graph(path=None):
+    graph = CitationGraph(path)
+    graph.add(_article("PMC1", [Reference("cites PMC2 by pmid", pmid="30000002"),
+                                Reference("cites PMC3 by doi", doi="10.1000/three")]))
+    graph.add(_article("PMC2", [Reference("cites PMC1", pmcid="PMC1")], pmid="30000002"))
+    graph.add(_article("PMC3", [], doi="10.1000/Three"))
+    return graph
+
+
+def test_harvested_article_joins_citations_by_its_own_ids():
+    graph = _graph()
+    assert graph.in_degree("PMC2") == 1
+    assert graph.in_degree("PMC3") == 1
+    assert graph.cited_by("pmid:30000002") == ["PMC1"]
+    # Nodes take the best identifier known for them
+    assert graph.cites("PMC1") == ["PMC2", "PMC3"]
+    assert len(graph) == 3
+
+
+def test_save_round_trip(tmp_path):
+    graph = _graph(str(tmp_path))
+    graph.save()
+    graph.add(_article("PMC4", [Reference("cites PMC1", pmcid="PMC1")]))
+    graph.save()
+    loaded = CitationGraph(str(tmp_path))
+    assert loaded.cited_by("PMC1") == ["PMC2", "PMC4"]
+    assert loaded.cites("PMC1") == ["PMC2", "PMC3"]
+    # Only the files of the last save are left
+    assert len(os.listdir(tmp_path)) == 5
+
+
+def test_interrupted_save_keeps_last_complete_one(tmp_path, monkeypatch):
+    graph = _graph(str(tmp_path))
+    graph.save()
+    graph.add(_article("PMC4", [Reference("cites PMC1", pmcid="PMC1")]))
+
+    def crash(*args, **kwargs):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(json, "dump", crash)
+    with pytest.raises(OSError):
+        graph.save()
+    monkeypatch.undo()
+    loaded = CitationGraph(str(tmp_path))
+    assert loaded.cited_by("PMC1") == ["PMC2"]
+    assert loaded.edge_count == 3
@@ -0,0 +1,318 @@
+"""
+NCBIClient plumbing on a stubbed session: rate limiting, the retry policy
+and Retry-After, the on-disk ResponseCache and the in-memory SearchCache.
+"""
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+import json
+import threading
+import time
+import zlib
+
+import pytest
+import requests
+
+from Utils.pubmed import (
+    BASE_URL,
+    NCBI_RATE_LIMIT,
+    NCBI_RATE_LIMIT_WITH_KEY,
+    RATE_LIMIT_HEADROOM,
+    RateLimiter,
+    ResponseCache,
+    RetryPolicy,
+    SearchCache,
+    search_pmc,
+)
+from stubs import make_response
+
+ESEARCH_URL = f"{BASE_URL}esearch.fcgi"
+EFETCH_URL = f"{BASE_URL}efetch.fcgi"
+
+ESEARCH_BODY = json.dumps({"esearchresult": {"idlist": ["1", "2"]}}).encode()
+
+
+class Clock:
+    """
+    Stand-in for time.monotonic/time.time that only moves when told to.
+    """
+
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(time, "monotonic", clock)
+    monkeypatch.setattr(time, "time", clock)
+    return clock
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    slept = []
+    monkeypatch.setattr(time, "sleep", slept.append)
+    return slept
+
+
+def test_rate_limiter_queues_callers_past_the_burst(clock):
+    limiter = RateLimiter(2, capacity=1)
+    assert [limiter.reserve() for _ in range(3)] == [0.0, 0.5, 1.0]
+    clock.now += 1.5
+    assert limiter.reserve() == 0.0
+
+
+def test_rate_limiter_refills_up_to_capacity(clock):
+    limiter = RateLimiter(1, capacity=2)
+    limiter.reserve()
+    clock.now += 60
+    assert [limiter.reserve() for _ in range(3)] == [0.0, 0.0, 1.0]
+
+
+def test_rate_limiter_acquire_sleeps_for_its_slot(clock, sleeps):
+    limiter = RateLimiter(4)
+    limiter.acquire()
+    limiter.acquire()
+    assert sleeps == [0.25]
+
+
+def test_rate_limiter_for_api_key_stays_under_ncbi_ceiling():
+    assert RateLimiter.for_api_key().rate == NCBI_RATE_LIMIT * RATE_LIMIT_HEADROOM
+    assert RateLimiter.for_api_key("key").rate == NCBI_RATE_LIMIT_WITH_KEY * RATE_LIMIT_HEADROOM
+
+
+def test_rate_limiters_sharing_a_lock_file_draw_from_one_bucket(tmp_path, clock):
+    path = str(tmp_path / "rate")
+    first, second = RateLimiter(2, lock_path=path), RateLimiter(2, lock_path=path)
+    assert [first.reserve(), second.reserve(), first.reserve()] == [0.0, 0.5, 1.0]
+
+
+def test_retry_after_accepts_seconds_and_http_dates(clock):
+    retry_after = RetryPolicy.retry_after
+    assert retry_after(make_response(503, headers={"Retry-After": "7"})) == 7.0
+    assert retry_after(make_response(503, headers={"Retry-After": "-3"})) == 0.0
+    when = datetime.fromtimestamp(clock.now, timezone.utc) + timedelta(seconds=30)
+    assert retry_after(make_response(503, headers={"Retry-After": format_datetime(when, usegmt=True)})) == 30.0
+    assert retry_after(make_response(503, headers={"Retry-After": "soon"})) is None
+    assert retry_after(make_response(503)) is None
+    assert retry_after(None) is None
+
+
+def test_retry_policy_prefers_retry_after_over_backoff(clock):
+    policy = RetryPolicy(backoff_base=100)
+    assert policy.next_delay(0, clock.now, response=make_response(503, headers={"Retry-After": "2"})) == 2.0
+    assert 0 <= policy.next_delay(0, clock.now, response=make_response(503)) <= 100
+
+
+def test_retry_policy_backoff_is_capped():
+    policy = RetryPolicy(backoff_base=1, backoff_max=3)
+    assert all(0 <= policy.backoff(10) <= 3 for _ in range(100))
+
+
+def test_retry_policy_gives_up(clock):
+    policy = RetryPolicy(max_attempts=3, max_elapsed=10)
+    busy = make_response(503, headers={"Retry-After": "1"})
+    assert policy.next_delay(1, clock.now, response=busy) == 1.0
+    assert policy.next_delay(2, clock.now, response=busy) is None
+    assert policy.next_delay(0, clock.now, response=make_response(404)) is None
+    assert policy.next_delay(0, clock.now - 9.5, response=busy) is None
+
+
+def test_retry_policy_retries_non_idempotent_requests_only_when_unsent(clock):
+    policy = RetryPolicy()
+    assert policy.next_delay(0, clock.now, idempotent=False, response=make_response(503)) is None
+    assert policy.next_delay(0, clock.now, idempotent=False,
+                             response=make_response(429, headers={"Retry-After": "1"})) == 1.0
+    assert policy.next_delay(0, clock.now, idempotent=False, error=requests.exceptions.ConnectTimeout()) is not None
+    assert policy.next_delay(0, clock.now, idempotent=False, error=requests.exceptions.ReadTimeout()) is None
+
+
+def test_client_retries_with_retry_after(stub_client, sleeps):
+    answers = iter([make_response(503, headers={"Retry-After": "2"}), make_response(200, b"ok")])
+    client = stub_client(lambda call: next(answers))
+    response = client.get("https://stub.test/file")
+    assert (response.status_code, response.content) == (200, b"ok")
+    assert len(client.session.calls) == 2
+    assert sleeps == [2.0]
+
+
+def test_client_returns_last_response_when_retries_run_out(stub_client, sleeps):
+    client = stub_client(lambda call: make_response(503), retry=RetryPolicy(max_attempts=3, backoff_base=0))
+    assert client.get("https://stub.test/file").status_code == 503
+    assert len(client.session.calls) == 3
+
+
+def test_client_raises_last_transfer_error(stub_client, sleeps):
+    def handler(call):
+        raise requests.exceptions.ConnectionError("refused")
+
+    client = stub_client(handler, retry=RetryPolicy(max_attempts=2, backoff_base=0))
+    with pytest.raises(requests.exceptions.ConnectionError):
+        client.get("https://stub.test/file")
+    assert len(client.session.calls) == 2
+
+
+def test_client_does_not_retry_post(stub_client, sleeps):
+    client = stub_client(lambda call: make_response(503))
+    assert client.request("POST", "https://stub.test/form", data={"a": "1"}).status_code == 503
+    assert len(client.session.calls) == 1
+
+
+def test_client_adds_api_key_to_ncbi_calls_only(stub_client):
+    client = stub_client(lambda call: make_response(200, b"{}"), api_key="secret")
+    client.get(ESEARCH_URL, params={"term": "x"})
+    client.request("POST", EFETCH_URL, data={"id": "1"}, idempotent=True)
+    client.get("https://stub.test/file")
+    get, post, other = client.session.calls
+    assert get["params"] == {"term": "x", "api_key": "secret"}
+    assert post["data"] == {"id": "1", "api_key": "secret"}
+    assert other["params"] is None
+
+
+def test_cache_key_ignores_parameter_order_and_api_key():
+    key = ResponseCache.key(ESEARCH_URL, {"term": "x", "retmax": 5})
+    assert ResponseCache.key(f"{ESEARCH_URL}?retmax=5", {"api_key": "secret", "term": "x"}) == key
+    assert ResponseCache.key(ESEARCH_URL, data={"retmax": 5, "term": "x"}) == key
+    assert ResponseCache.key(ESEARCH_URL, {"term": "y", "retmax": 5}) != key
+
+
+def test_cache_answers_repeat_calls(stub_client, tmp_path):
+    cache = ResponseCache(str(tmp_path / "cache.db"))
+    client = stub_client(lambda call: make_response(200, ESEARCH_BODY, {"Content-Type": "application/json"},
+                                                    url=call["url"]), cache=cache)
+    first = client.get(ESEARCH_URL, params={"term": "x"})
+    second = client.get(ESEARCH_URL, params={"term": "x"})
+    assert second.from_cache
+    assert second.json() == first.json()
+    assert len(client.session.calls) == 1
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_cache_entries_expire_after_endpoint_ttl(stub_client, tmp_path, clock):
+    cache = ResponseCache(str(tmp_path / "cache.db"), ttls={"esearch.fcgi": 60})
+    client = stub_client(lambda call: make_response(200, ESEARCH_BODY), cache=cache)
+    client.get(ESEARCH_URL, params={"term": "x"})
+    clock.now += 59
+    client.get(ESEARCH_URL, params={"term": "x"})
+    assert len(client.session.calls) == 1
+    clock.now += 2
+    client.get(ESEARCH_URL, params={"term": "x"})
+    assert len(client.session.calls) == 2
+
+
+@pytest.mark.parametrize("url, params, body", [
+    ("https://stub.test/file.pdf", None, b"%PDF"),  # no TTL for the endpoint
+    (ESEARCH_URL, {"term": "x", "WebEnv": "session"}, ESEARCH_BODY),  # history session
+    (ESEARCH_URL, {"term": "x"}, b'{"esearchresult": {"ERROR": "Invalid query"}}'),  # NCBI error payload
+    (EFETCH_URL, {"id": "1"}, b"<pmc-articleset><article>"),  # cut short
+])
+def test_cache_skips_uncacheable_responses(stub_client, tmp_path, url, params, body):
+    cache = ResponseCache(str(tmp_path / "cache.db"))
+    client = stub_client(lambda call: make_response(200, body), cache=cache)
+    client.get(url, params=params)
+    client.get(url, params=params)
+    assert len(client.session.calls) == 2
+
+
+def test_cache_keeps_streamed_body_only_once_committed(stub_client, tmp_path):
+    cache = ResponseCache(str(tmp_path / "cache.db"))
+    client = stub_client(lambda call: make_response(200, b"<pmc-articleset/>"), cache=cache)
+    response = client.get(EFETCH_URL, params={"id": "1"}, stream=True)
+    assert response.raw.read() == b"<pmc-articleset/>"
+    response = client.get(EFETCH_URL, params={"id": "1"}, stream=True)
+    assert len(client.session.calls) == 2
+    response.raw.read()
+    response.commit_cache()
+    cached = client.get(EFETCH_URL, params={"id": "1"}, stream=True)
+    assert cached.raw.read() == b"<pmc-articleset/>"
+    assert len(client.session.calls) == 2
+
+
+def test_cache_evicts_least_recently_used(tmp_path, clock):
+    compressed = zlib.compress(b"<a/>")
+    cache = ResponseCache(str(tmp_path / "cache.db"), max_bytes=2 * len(compressed))
+    for key in ("a", "b"):
+        cache.put(key, make_response(200), compressed)
+        clock.now += 1
+    assert cache.get("a", 60) is not None
+    clock.now += 1
+    cache.put("c", make_response(200), compressed)
+    assert cache.get("b", 60) is None
+    assert cache.get("a", 60).content == b"<a/>"
+    assert cache.get("c", 60) is not None
+
+
+def test_search_cache_hits_until_ttl(clock):
+    cache = SearchCache(ttl=10)
+    calls = []
+
+    def search():
+        calls.append(1)
+        return ("1", "2")
+
+    assert cache.get_or_call("q", search) == ("1", "2")
+    clock.now += 9
+    assert cache.get_or_call("q", search) == ("1", "2")
+    assert len(calls) == 1
+    clock.now += 2
+    cache.get_or_call("q", search)
+    assert len(calls) == 2
+    assert (cache.hits, cache.misses) == (1, 2)
+
+
+def test_search_cache_evicts_least_recently_used():
+    cache = SearchCache(max_entries=2)
+    for key in ("a", "b"):
+        cache.get_or_call(key, lambda: key)
+    cache.get_or_call("a", lambda: "again")
+    cache.get_or_call("c", lambda: "c")
+    assert cache.get_or_call("a", lambda: "again") == "a"
+    assert cache.get_or_call("b", lambda: "again") == "again"
+
+
+def test_search_cache_does_not_keep_errors():
+    cache = SearchCache()
+
+    def fail():
+        raise RuntimeError("esearch down")
+
+    with pytest.raises(RuntimeError):
+        cache.get_or_call("q", fail)
+    assert cache.get_or_call("q", lambda: ("1",)) == ("1",)
+
+
+def test_search_cache_coalesces_concurrent_calls():
+    cache = SearchCache()
+    release = threading.Event()
+    calls = []
+
+    def search():
+        calls.append(1)
+        release.wait(5)
+        return ("1",)
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get_or_call("q", search))) for _ in range(2)]
+    threads[0].start()
+    while not calls:
+        time.sleep(0.001)
+    threads[1].start()
+    deadline = time.monotonic() + 5
+    while cache.coalesced < 1 and time.monotonic() < deadline:
+        time.sleep(0.001)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+    assert results == [("1",), ("1",)]
+    assert (len(calls), cache.coalesced) == (1, 1)
+
+
+def test_search_pmc_uses_cache(stub_client):
+    client = stub_client(lambda call: make_response(200, ESEARCH_BODY))
+    cache = SearchCache()
+    for _ in range(2):
+        assert search_pmc("x", mindate="2024/01/01", maxdate="2024/01/31", client=client, cache=cache) == ["1", "2"]
+    assert len(client.session.calls) == 1
@@ -0,0 +1,305 @@
+"""
+File downloads on a stubbed session: resuming from .part checkpoints,
+revalidating what the manifest records, and choosing what an OA package
+extracts.
+"""
+import hashlib
+import io
+import json
+import os
+import tarfile
+
+import pytest
+
+from Utils.pubmed import (
+    DownloadManifest,
+    ExtractionPolicy,
+    _download_to_file,
+    _extract_members,
+    _fetch_article_files,
+    _new_report,
+    _quiet,
+    _stream_extract_package,
+)
+from stubs import CutOffBody, make_response
+
+URL = "https://stub.test/PMC1.pdf"
+# Spans several of the 8192-byte chunks downloads are written in, so a
+# transfer cut off at CUT has already written some of them
+CONTENT = bytes(range(256)) * 100
+CUT = 16384
+
+
+def file_server(content=CONTENT, etag='"v1"', last_modified=None, cuts=()):
+    """
+    Handler serving content like a static file server: Range requests
+    guarded by a matching If-Range get a 206 (416 past the end), a
+    matching If-None-Match a 304. The n-th response is cut off after
+    cuts[n] bytes (None sends it whole).
+    """
+    cuts = list(cuts)
+
+    def handler(call):
+        headers = call["headers"]
+        validators = {name: value for name, value in (("ETag", etag), ("Last-Modified", last_modified)) if value}
+        if etag and headers.get("If-None-Match") == etag:
+            return make_response(304, headers=validators)
+
+        status, start = 200, 0
+        if "Range" in headers and headers.get("If-Range") in validators.values():
+            start = int(headers["Range"][len("bytes="):-1])
+            if start >= len(content):
+                return make_response(416, headers={"Content-Range": f"bytes */{len(content)}"})
+            status = 206
+            validators["Content-Range"] = f"bytes {start}-{len(content) - 1}/{len(content)}"
+        body = content[start:]
+        cut = cuts.pop(0) if cuts else None
+        validators["Content-Length"] = str(len(body))
+        return make_response(status, CutOffBody(body[:cut]) if cut is not None else body, validators)
+
+    return handler
+
+
+def _checkpoint(save_path, data, size=len(CONTENT), etag='"v1"', url=URL):
+    # A .part file and its checkpoint as an interrupted earlier run leaves them
+    with open(f"{save_path}.part", "wb") as f:
+        f.write(data)
+    with open(f"{save_path}.part.json", "w", encoding="utf-8") as f:
+        json.dump({"url": url, "size": size, "etag": etag, "last_modified": None}, f)
+
+
+def _read(path):
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def test_download_writes_file_and_manifest_entry(stub_client, tmp_path):
+    client = stub_client(file_server())
+    save_path = str(tmp_path / "PMC1.pdf")
+    transferred, entry = _download_to_file(client, URL, save_path)
+    assert _read(save_path) == CONTENT
+    assert transferred == len(CONTENT)
+    assert entry == {"url": URL, "size": len(CONTENT), "sha256": hashlib.sha256(CONTENT).hexdigest(),
+                     "etag": '"v1"', "last_modified": None}
+    assert os.listdir(tmp_path) == ["PMC1.pdf"]
+    assert client.session.calls[0]["headers"] == {"Accept-Encoding": "identity"}
+
+
+def test_download_resumes_cut_transfer_with_range(stub_client, tmp_path):
+    client = stub_client(file_server(cuts=[CUT]))
+    save_path = str(tmp_path / "PMC1.pdf")
+    transferred, _ = _download_to_file(client, URL, save_path)
+    assert _read(save_path) == CONTENT
+    assert transferred == len(CONTENT)
+    resumed = client.session.calls[1]["headers"]
+    assert (resumed["Range"], resumed["If-Range"]) == (f"bytes={CUT}-", '"v1"')
+
+
+def test_download_resumes_part_file_of_earlier_run(stub_client, tmp_path):
+    client = stub_client(file_server())
+    save_path = str(tmp_path / "PMC1.pdf")
+    _checkpoint(save_path, CONTENT[:7])
+    transferred, _ = _download_to_file(client, URL, save_path)
+    assert _read(save_path) == CONTENT
+    assert transferred == len(CONTENT) - 7
+    assert len(client.session.calls) == 1
+
+
+def test_download_restarts_when_file_changed_since_checkpoint(stub_client, tmp_path):
+    new_content = b"changed " + CONTENT
+    client = stub_client(file_server(new_content, etag='"v2"'))
+    save_path = str(tmp_path / "PMC1.pdf")
+    _checkpoint(save_path, CONTENT[:7])
+    _, entry = _download_to_file(client, URL, save_path)
+    assert _read(save_path) == new_content
+    assert entry["etag"] == '"v2"'
+
+
+def test_download_ignores_checkpoint_of_another_url(stub_client, tmp_path):
+    client = stub_client(file_server())
+    save_path = str(tmp_path / "PMC1.pdf")
+    _checkpoint(save_path, b"other file", url="https://stub.test/other.pdf")
+    _download_to_file(client, URL, save_path)
+    assert _read(save_path) == CONTENT
+    assert "Range" not in client.session.calls[0]["headers"]
+
+
+def test_download_restarts_when_206_starts_elsewhere(stub_client, tmp_path):
+    serve = file_server()
+    answers = [make_response(206, CONTENT, {"Content-Range": f"bytes 0-{len(CONTENT) - 1}/{len(CONTENT)}",
+                                            "ETag": '"v1"'})]
+    client = stub_client(lambda call: answers.pop(0) if answers else serve(call))
+    save_path = str(tmp_path / "PMC1.pdf")
+    _checkpoint(save_path, CONTENT[:7])
+    _download_to_file(client, URL, save_path)
+    assert _read(save_path) == CONTENT
+    assert [("Range" in call["headers"]) for call in client.session.calls] == [True, False]
+
+
+def test_download_416_completes_full_part_file(stub_client, tmp_path):
+    client = stub_client(file_server())
+    save_path = str(tmp_path / "PMC1.pdf")
+    _checkpoint(save_path, CONTENT)
+    transferred, entry = _download_to_file(client, URL, save_path)
+    assert (transferred, _read(save_path)) == (0, CONTENT)
+    assert entry["sha256"] == hashlib.sha256(CONTENT).hexdigest()
+
+
+def test_download_416_restarts_stale_part_file(stub_client, tmp_path):
+    client = stub_client(file_server(CONTENT[:10]))
+    save_path = str(tmp_path / "PMC1.pdf")
+    _checkpoint(save_path, CONTENT[:12], size=len(CONTENT))
+    _download_to_file(client, URL, save_path)
+    assert _read(save_path) == CONTENT[:10]
+    assert len(client.session.calls) == 2
+
+
+def test_download_with_weak_etag_restarts_cut_transfer(stub_client, tmp_path):
+    # A weak ETag cannot guard a byte range, so nothing is resumed
+    client = stub_client(file_server(etag='W/"v1"', cuts=[CUT]))
+    save_path = str(tmp_path / "PMC1.pdf")
+    transferred, entry = _download_to_file(client, URL, save_path)
+    assert _read(save_path) == CONTENT
+    assert transferred == CUT + len(CONTENT)
+    assert "Range" not in client.session.calls[1]["headers"]
+    assert entry["etag"] is None
+
+
+def test_download_resumes_on_last_modified(stub_client, tmp_path):
+    modified = "Wed, 01 May 2024 00:00:00 GMT"
+    client = stub_client(file_server(etag=None, last_modified=modified, cuts=[CUT]))
+    save_path = str(tmp_path / "PMC1.pdf")
+    _, entry = _download_to_file(client, URL, save_path)
+    assert _read(save_path) == CONTENT
+    assert client.session.calls[1]["headers"]["If-Range"] == modified
+    assert entry["last_modified"] == modified
+
+
+def test_download_returns_none_when_cached_copy_is_current(stub_client, tmp_path):
+    client = stub_client(file_server())
+    save_path = str(tmp_path / "PMC1.pdf")
+    assert _download_to_file(client, URL, save_path, cached={"etag": '"v1"', "last_modified": None}) is None
+    assert client.session.calls[0]["headers"]["If-None-Match"] == '"v1"'
+    assert not os.path.exists(save_path)
+
+
+def _fetch(client, save_dir, manifest, **kwargs):
+    report = _new_report("PMC1")
+    _fetch_article_files("PMC1", {"pdf": URL}, str(save_dir), client, report, log=_quiet, manifest=manifest,
+                         **kwargs)
+    return report
+
+
+def test_manifest_revalidates_recorded_file(stub_client, tmp_path):
+    client = stub_client(file_server())
+    manifest = DownloadManifest(str(tmp_path))
+    first = _fetch(client, tmp_path, manifest)
+    assert first["success"] and first["bytes"] == len(CONTENT)
+    entry = manifest.get("PMC1/PMC1.pdf")
+    assert entry["sha256"] == hashlib.sha256(CONTENT).hexdigest()
+
+    second = _fetch(client, tmp_path, manifest)
+    assert second["skipped"] == second["files"] == [str(tmp_path / "PMC1" / "PMC1.pdf")]
+    assert second["bytes"] == 0
+    assert client.session.calls[1]["headers"]["If-None-Match"] == '"v1"'
+
+
+def test_manifest_skips_recorded_file_without_revalidating(stub_client, tmp_path):
+    client = stub_client(file_server())
+    manifest = DownloadManifest(str(tmp_path))
+    _fetch(client, tmp_path, manifest)
+    report = _fetch(client, tmp_path, manifest, revalidate=False)
+    assert report["skipped"] and len(client.session.calls) == 1
+
+
+def test_manifest_refetches_file_changed_on_disk(stub_client, tmp_path):
+    client = stub_client(file_server())
+    manifest = DownloadManifest(str(tmp_path))
+    _fetch(client, tmp_path, manifest)
+    path = tmp_path / "PMC1" / "PMC1.pdf"
+
+    path.write_bytes(CONTENT[:5])  # wrong size: always caught
+    assert not _fetch(client, tmp_path, manifest)["skipped"]
+    assert "If-None-Match" not in client.session.calls[1]["headers"]
+
+    path.write_bytes(CONTENT.upper())  # same size: only caught by verify
+    assert _fetch(client, tmp_path, manifest, revalidate=False)["skipped"]
+    assert not _fetch(client, tmp_path, manifest, revalidate=False, verify=True)["skipped"]
+    assert path.read_bytes() == CONTENT
+
+
+def test_manifest_survives_save_and_reload(stub_client, tmp_path):
+    client = stub_client(file_server())
+    manifest = DownloadManifest(str(tmp_path))
+    _fetch(client, tmp_path, manifest)
+    manifest.save()
+    assert DownloadManifest(str(tmp_path)).get("PMC1/PMC1.pdf") == manifest.get("PMC1/PMC1.pdf")
+    assert sorted(os.listdir(tmp_path)) == ["PMC1", DownloadManifest.FILENAME]
+
+
+def test_corrupt_manifest_is_treated_as_empty(tmp_path, capsys):
+    (tmp_path / DownloadManifest.FILENAME).write_text('{"PMC1/PMC1.pdf": {"url"')
+    assert len(DownloadManifest(str(tmp_path))) == 0
+    assert "Ignoring unreadable" in capsys.readouterr().out
+
+
+@pytest.mark.parametrize("policy, members, expected", [
+    # A .nxml beats a .xml whichever comes first; the first PDF wins
+    (ExtractionPolicy(), ["a.xml", "b.nxml", "c.xml", "d.pdf", "e.pdf", "f.jpg"],
+     [("PMC1.nxml", "xml", 0), ("PMC1.nxml", "xml", 1), None, ("PMC1.pdf", "pdf", 0), None, None]),
+    (ExtractionPolicy(primary_pdf="largest"), ["small.pdf", "large.pdf", "mid.pdf"],
+     [("PMC1.pdf", "pdf", 10), ("PMC1.pdf", "pdf", 30), None]),
+    (ExtractionPolicy(primary_pdf="*MAIN*.pdf"), ["supp.pdf", "dir/main.pdf", "main2.pdf"],
+     [("PMC1.pdf", "pdf", 0), ("PMC1.pdf", "pdf", 1), None]),
+    (ExtractionPolicy(include=["*.JPG", "figs/*"], exclude=["*thumb*"], max_member_size=25),
+     ["dir/fig1.jpg", "dir/fig1_thumb.jpg", "figs/table.csv", "big.jpg"],
+     [("fig1.jpg", None, None), None, ("table.csv", None, None), None]),
+])
+def test_extraction_policy_targets(policy, members, expected):
+    sizes = {"small.pdf": 10, "large.pdf": 30, "mid.pdf": 20, "big.jpg": 40}
+    primaries = {}
+    targets = []
+    for name in members:
+        target, kind, rank = policy.target(name, sizes.get(name, 1), "PMC1", primaries)
+        targets.append((target, kind, rank) if target is not None else None)
+        if kind is not None:
+            primaries[kind] = rank
+    assert targets == expected
+
+
+def _package(members):
+    data = io.BytesIO()
+    with tarfile.open(fileobj=data, mode="w:gz") as tar:
+        for name, content in members:
+            info = tarfile.TarInfo(name)
+            info.size = len(content)
+            tar.addfile(info, io.BytesIO(content))
+    return data.getvalue()
+
+
+PACKAGE = _package([
+    ("PMC1/article.pdf", b"first pdf"),
+    ("PMC1/article_main.pdf", b"the larger main pdf"),
+    ("PMC1/article.nxml", b"<article/>"),
+    ("PMC1/fig1.jpg", b"jpeg"),
+    ("../../escape.jpg", b"jpeg"),
+])
+
+
+def test_extract_members_applies_policy_inside_target_dir(tmp_path):
+    policy = ExtractionPolicy(include=["*.jpg"], primary_pdf="largest")
+    written = _extract_members(io.BytesIO(PACKAGE), str(tmp_path), "PMC1", policy, log=_quiet)
+    assert sorted(os.path.basename(path) for path in written) == ["PMC1.nxml", "PMC1.pdf", "escape.jpg",
+                                                                    "fig1.jpg"]
+    assert sorted(os.listdir(tmp_path)) == ["PMC1.nxml", "PMC1.pdf", "escape.jpg", "fig1.jpg"]
+    assert (tmp_path / "PMC1.pdf").read_bytes() == b"the larger main pdf"
+
+
+def test_stream_extract_package_records_package(stub_client, tmp_path):
+    client = stub_client(file_server(PACKAGE))
+    transferred, entry, written = _stream_extract_package(client, "https://stub.test/PMC1.tar.gz", str(tmp_path),
+                                                          "PMC1", log=_quiet)
+    assert transferred == entry["size"] == len(PACKAGE)
+    assert entry["sha256"] == hashlib.sha256(PACKAGE).hexdigest()
+    assert sorted(os.path.basename(path) for path in written) == ["PMC1.nxml", "PMC1.pdf"]
+    assert (tmp_path / "PMC1.pdf").read_bytes() == b"first pdf"
@@ -0,0 +1,334 @@
+"""
+Golden tests for article extraction: _parse_article must give the same
+output as _parse_article_reference, the original per-field extractor, on
+the JATS shapes that trip up scoped lookups, and every parser backend
+must give that output too, for efetch documents and OA service answers.
+"""
+import io
+import xml.etree.ElementTree as ET
+
+import pytest
+
+from Utils.pubmed import (
+    _ElementSkipper,
+    _iter_articles,
+    _lookup_oa_links,
+    _parse_article,
+    _parse_article_reference,
+    _resolve_oa_batch,
+    get_parser_backend,
+    lxml_etree,
+)
+
+BACKENDS = [
+    "etree",
+    pytest.param("lxml", marks=pytest.mark.skipif(lxml_etree is None, reason="lxml is not installed")),
+]
+
+FULL = """
+<article article-type="research-article">
+  <front>
+    <journal-meta><journal-title-group><journal-title>J Test</journal-title></journal-title-group></journal-meta>
+    <article-meta>
+      <article-id pub-id-type="pmid">30000001</article-id>
+      <article-id pub-id-type="pmcid">PMC1</article-id>
+      <article-id pub-id-type="doi">https://doi.org/10.1000/Golden</article-id>
+      <title-group><article-title>A <italic>golden</italic> study</article-title></title-group>
+      <contrib-group>
+        <contrib contrib-type="author"><name><surname>Doe</surname><given-names>Jane</given-names></name></contrib>
+        <contrib contrib-type="author"><name><surname>Roe</surname></name></contrib>
+        <contrib contrib-type="editor"><name><surname>Ed</surname><given-names>E</given-names></name></contrib>
+      </contrib-group>
+      <pub-date pub-type="epub"><year>2020</year><month>05</month></pub-date>
+      <abstract><p>Some <bold>bold</bold> text.</p></abstract>
+      <kwd-group><kwd>alpha</kwd><kwd/><kwd>beta</kwd></kwd-group>
+    </article-meta>
+  </front>
+  <body><sec><p>Body text.</p></sec></body>
+  <back>
+    <ref-list>
+      <ref id="r1"><mixed-citation>Smith J. Text only. 2001.</mixed-citation></ref>
+      <ref id="r2">
+        <element-citation publication-type="journal">
+          <person-group person-group-type="author"><name><surname>Lee</surname><given-names>K</given-names></name></person-group>
+          <source>Nature</source><year>2019</year>
+        </element-citation>
+      </ref>
+      <ref id="r3"><element-citation>Element</element-citation><mixed-citation>Mixed wins</mixed-citation></ref>
+      <ref id="r4"><citation>Plain citation</citation></ref>
+      <ref id="r5"><label>5</label></ref>
+    </ref-list>
+  </back>
+</article>
+"""
+
+NO_META = """
+<article article-type="editorial">
+  <front><journal-meta><journal-title>J Test</journal-title></journal-meta></front>
+  <body><p>Text</p></body>
+</article>
+"""
+
+SUB_ARTICLE = """
+<article article-type="letter">
+  <front>
+    <article-meta>
+      <article-id pub-id-type="pmcid">2</article-id>
+      <title-group><article-title>Main</article-title></title-group>
+      <pub-date><month>3</month></pub-date>
+    </article-meta>
+  </front>
+  <back><ref-list><ref><mixed-citation>Main ref</mixed-citation></ref></ref-list></back>
+  <sub-article article-type="reply">
+    <front>
+      <journal-meta><journal-title>Sub journal</journal-title></journal-meta>
+      <article-meta>
+        <title-group><article-title>Reply</article-title></title-group>
+        <contrib contrib-type="author"><name><surname>Sub</surname></name></contrib>
+        <abstract>Sub abstract</abstract>
+        <kwd>sub</kwd>
+      </article-meta>
+    </front>
+    <back><ref-list><ref><mixed-citation>Sub ref</mixed-citation></ref></ref-list></back>
+  </sub-article>
+</article>
+"""
+
+META_IN_SUB_ARTICLE = """
+<article>
+  <body><p>No front</p></body>
+  <sub-article>
+    <front-stub>
+      <article-meta><article-id pub-id-type="pmcid">PMC3</article-id></article-meta>
+    </front-stub>
+  </sub-article>
+</article>
+"""
+
+REFS_IN_BODY = """
+<article article-type="review-article">
+  <front><article-meta><article-id pub-id-type="pmcid">PMC4</article-id></article-meta></front>
+  <body>
+    <sec><p>Text</p><ref-list><ref><mixed-citation>Body ref</mixed-citation></ref></ref-list></sec>
+  </body>
+  <back><ref-list><ref><mixed-citation>Back ref</mixed-citation></ref></ref-list></back>
+</article>
+"""
+
+CASES = {
+    "full": FULL,
+    "no_meta": NO_META,
+    "sub_article": SUB_ARTICLE,
+    "meta_in_sub_article": META_IN_SUB_ARTICLE,
+    "refs_in_body": REFS_IN_BODY,
+}
+
+GOLDEN = {
+    "full": {
+        "pmcid": "PMC1",
+        "title": "A golden study",
+        "journal": "J Test",
+        "pub_date": "2020-05-01",
+        "authors": ["Doe, Jane", "Roe"],
+        "pub_type": "research-article",
+        "abstract": "Some bold text.",
+        "mesh_terms": ["alpha", "beta"],
+        "references": ["Smith J. Text only. 2001.", "LeeKNature2019", "Mixed wins", "Plain citation"],
+    },
+    "no_meta": None,
+    "sub_article": {
+        "pmcid": "PMC2",
+        "title": "Main",
+        "journal": "Sub journal",
+        "pub_date": "-3-01",
+        "authors": [],
+        "pub_type": "letter",
+        "abstract": "No Abstract",
+        "mesh_terms": [],
+        "references": ["Main ref", "Sub ref"],
+    },
+    "meta_in_sub_article": {
+        "pmcid": "PMC3",
+        "title": "No Title",
+        "journal": "Unknown Journal",
+        "pub_date": "Unknown Date",
+        "authors": [],
+        "pub_type": "Unknown",
+        "abstract": "No Abstract",
+        "mesh_terms": [],
+        "references": [],
+    },
+    "refs_in_body": {
+        "pmcid": "PMC4",
+        "title": "No Title",
+        "journal": "Unknown Journal",
+        "pub_date": "Unknown Date",
+        "authors": [],
+        "pub_type": "review-article",
+        "abstract": "No Abstract",
+        "mesh_terms": [],
+        "references": ["Body ref", "Back ref"],
+    },
+}
+
+
+def _element(xml):
+    # Whitespace between elements is not part of any field
+    return ET.fromstring(" ".join(xml.split()).replace("> <", "><"))
+
+
+@pytest.mark.parametrize("name", CASES)
+def test_reference_extractor_matches_golden(name):
+    assert _parse_article_reference(_element(CASES[name])) == GOLDEN[name]
+
+
+@pytest.mark.parametrize("name", CASES)
+def test_extractor_matches_reference(name):
+    element = _element(CASES[name])
+    expected = _parse_article_reference(element)
+    article = _parse_article(element)
+    if expected is None:
+        assert article is None
+    else:
+        assert article == expected
+        assert article.to_dict() == expected
+
+
+@pytest.mark.parametrize("name", CASES)
+def test_lazy_extractor_matches_reference(name):
+    element = _element(CASES[name])
+    expected = _parse_article_reference(element)
+    article = _parse_article(element, lazy=True)
+    if expected is None:
+        assert article is None
+    else:
+        assert not article.loaded
+        assert article == expected
+
+
+def _document(*names):
+    xml = "<pmc-articleset>" + "".join(CASES[name] for name in names) + "</pmc-articleset>"
+    return " ".join(xml.split()).replace("> <", "><").encode()
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+@pytest.mark.parametrize("name", CASES)
+def test_backend_parse_article_matches_golden(backend, name):
+    backend = get_parser_backend(backend)
+    root = backend.fromstring(_document(name))
+    article = backend.parse_article(root[0])
+    if GOLDEN[name] is None:
+        assert article is None
+    else:
+        assert article == GOLDEN[name]
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_backend_stream_matches_golden(backend):
+    articles = list(_iter_articles(io.BytesIO(_document(*CASES)), get_parser_backend(backend)))
+    assert articles == [golden for golden in GOLDEN.values() if golden is not None]
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_backend_lazy_stream_matches_golden(backend):
+    articles = list(_iter_articles(io.BytesIO(_document(*CASES)), get_parser_backend(backend), lazy=True))
+    assert articles == [golden for golden in GOLDEN.values() if golden is not None]
+
+
+@pytest.mark.parametrize("lazy", [False, True])
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_backend_parses_own_ids(backend, lazy):
+    full, sub_article = _iter_articles(io.BytesIO(_document("full", "sub_article")), get_parser_backend(backend),
+                                       lazy=lazy)
+    assert (full.pmid, full.doi) == ("30000001", "10.1000/golden")
+    assert (sub_article.pmid, sub_article.doi) == (None, None)
+
+
+@pytest.mark.parametrize("lazy", [False, True])
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_backend_stream_structured_references(backend, lazy):
+    # Parsed into packed fields while the article streams past, so they
+    # outlive the stream clearing its element
+    article, = _iter_articles(io.BytesIO(_document("full")), get_parser_backend(backend), lazy=lazy)
+    refs = article.references
+    assert [ref.text for ref in refs] == GOLDEN["full"]["references"]
+    assert [str(author) for author in refs[1].authors] == ["Lee, K"]
+    assert (refs[1].source, refs[1].year) == ("Nature", "2019")
+    assert article.references == refs
+    assert article["references"] == GOLDEN["full"]["references"]
+
+
+@pytest.mark.parametrize("fields", [("title", "references"), ("title",)])
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_backend_projected_stream_matches_golden(backend, fields):
+    # A projection drops the other keys but never changes a requested one
+    article, = _iter_articles(io.BytesIO(_document("refs_in_body")), get_parser_backend(backend), fields=fields)
+    assert article == {key: GOLDEN["refs_in_body"][key] for key in ("pmcid",) + fields}
+
+
+@pytest.mark.parametrize("chunk_size", [1, 3, 65536])
+def test_skipper_ignores_tags_in_comments_cdata_and_pis(monkeypatch, chunk_size):
+    monkeypatch.setattr(_ElementSkipper, "CHUNK_SIZE", chunk_size)
+    source = (b"<a><!-- <body> --><t>keep</t><body>x<![CDATA[</body>]]>y</body>"
+              b"<?pi <back ?><back><!-- </back> --></back><u/></a>")
+    skipper = _ElementSkipper(io.BytesIO(source), ["body", "back"])
+    assert b"".join(iter(lambda: skipper.read(5), b"")) == b"<a><!-- <body> --><t>keep</t><?pi <back ?><u/></a>"
+
+
+OA_RECORD = b"""<record id="PMC1" citation="J Test" license="CC BY">
+  <link format="tgz" updated="2024-01-01" href="ftp://ftp.ncbi.nlm.nih.gov/pub/pmc/oa_package/PMC1.tar.gz"/>
+  <link format="pdf" updated="2024-01-01" href="https://ftp.ncbi.nlm.nih.gov/pub/pmc/oa_pdf/PMC1.pdf"/>
+</record>"""
+
+OA_SINGLE = b"<OA><responseDate>2024-01-01</responseDate><records>" + OA_RECORD + b"</records></OA>"
+
+OA_BATCH = (b"<OA><responseDate>2024-01-01</responseDate><records>" + OA_RECORD
+            + b'<record id="PMC2"><link format="tgz" href="ftp://ftp.ncbi.nlm.nih.gov/pub/pmc/oa_package/PMC2.tar.gz"/>'
+            + b"</record></records></OA>")
+
+OA_ERROR = b"""<OA><responseDate>2024-01-01</responseDate>
+<error code="idIsNotOpenAccess">identifier 'PMC9' is not Open Access</error></OA>"""
+
+
+class _CannedResponse:
+    def __init__(self, content):
+        self.content = content
+
+    def raise_for_status(self):
+        pass
+
+
+class _CannedClient:
+    def __init__(self, content):
+        self.content = content
+
+    def get(self, url, params=None, **kwargs):
+        return _CannedResponse(self.content)
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_backend_oa_links(backend):
+    links, error = _lookup_oa_links("PMC1", _CannedClient(OA_SINGLE), get_parser_backend(backend))
+    assert error is None
+    assert links == {
+        "tgz": "https://ftp.ncbi.nlm.nih.gov/pub/pmc/oa_package/PMC1.tar.gz",
+        "pdf": "https://ftp.ncbi.nlm.nih.gov/pub/pmc/oa_pdf/PMC1.pdf",
+    }
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_backend_oa_error(backend):
+    links, error = _lookup_oa_links("PMC9", _CannedClient(OA_ERROR), get_parser_backend(backend))
+    assert links is None
+    assert error == "OA API Error for PMC9: idIsNotOpenAccess - identifier 'PMC9' is not Open Access"
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_backend_oa_batch(backend):
+    results = _resolve_oa_batch(["PMC1", "PMC2", "PMC3"], _CannedClient(OA_BATCH), get_parser_backend(backend))
+    assert results == {
+        "PMC1": ({"tgz": "https://ftp.ncbi.nlm.nih.gov/pub/pmc/oa_package/PMC1.tar.gz",
+                  "pdf": "https://ftp.ncbi.nlm.nih.gov/pub/pmc/oa_pdf/PMC1.pdf"}, None),
+        "PMC2": ({"tgz": "https://ftp.ncbi.nlm.nih.gov/pub/pmc/oa_package/PMC2.tar.gz"}, None),
+        "PMC3": (None, "OA API Error for PMC3: not in OA service response"),
+    }
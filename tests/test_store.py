@@ -0,0 +1,183 @@
+"""
+ArticleStore round trips, store-backed get_pmc_metadata, and incremental
+sync_pmc runs against a stubbed NCBI.
+"""
+import json
+
+import pytest
+
+from Utils.pubmed import (
+    Article,
+    ArticleStore,
+    Author,
+    Reference,
+    SyncState,
+    get_pmc_metadata,
+    sync_pmc,
+)
+from stubs import make_response
+
+
+def _article(pmcid, title="A stored study", references=None):
+    if references is None:
+        references = [
+            Reference("Lee K. Nature 2019;12:1-9.", [Author("Lee", "K"), Author("WHO")], "2019", "Nature", "12",
+                      "1-9", "10.1000/cited", "31000001", "PMC77"),
+            Reference("A citation without markup"),
+        ]
+    return Article(pmcid, title, "J Test", "2024-05-01", "research-article", "An abstract.",
+                   [Author("Smith", "Jane"), Author("Consortium")], ["kw1", "kw2"], references,
+                   pmid="30000001", doi="10.1000/stored")
+
+
+def _fields(article):
+    return (article.to_dict(), article.authors, article.references, article.keywords, article.pmid, article.doi)
+
+
+@pytest.fixture
+def store(tmp_path):
+    with ArticleStore(str(tmp_path / "articles.db")) as store:
+        yield store
+
+
+def test_store_round_trips_articles(store, tmp_path):
+    article = _article("PMC1")
+    assert store.put_many([article]) == 1
+    assert _fields(store.get("PMC1")) == _fields(article)
+    with ArticleStore(store.path) as reopened:
+        assert _fields(reopened.get("1")) == _fields(article)
+    assert "PMC1" in store and "PMC2" not in store
+    assert len(store) == 1
+
+
+def test_store_replaces_records(store):
+    store.put_many([_article("PMC1")])
+    store.put_many([_article("PMC1", title="Corrected", references=[Reference("Only one")])])
+    stored = store.get("PMC1")
+    assert stored.title == "Corrected"
+    assert [ref.text for ref in stored.references] == ["Only one"]
+    assert store.citing(doi="10.1000/cited") == []
+    assert len(store) == 1
+
+
+def test_store_get_many_keeps_request_order(store):
+    store.put_many([_article("PMC1"), _article("PMC2")])
+    assert list(store.get_many(["2", "PMC9", "PMC1", "PMC2"])) == ["PMC2", "PMC1"]
+
+
+def test_store_takes_dicts_and_rejects_projections(store):
+    assert store.put_many([_article("PMC1").to_dict()]) == 1
+    assert store.get("PMC1") == _article("PMC1")
+    assert store.put_many([_article("Unknown")]) == 0
+    with pytest.raises(ValueError):
+        store.put_many([_article("PMC2").project(("title",))])
+
+
+def test_store_finds_citing_articles_by_any_identifier(store):
+    store.put_many([_article("PMC1"), _article("PMC2", references=[Reference("x", pmid="31000001")])])
+    assert store.citing(doi="https://doi.org/10.1000/CITED") == ["PMC1"]
+    assert store.citing(pmid="31000001") == ["PMC1", "PMC2"]
+    assert store.citing(pmcid="77") == ["PMC1"]
+    assert store.citing() == []
+
+
+def _efetch_article(uid):
+    return f"""<article article-type="research-article"><front>
+      <journal-meta><journal-title-group><journal-title>J Test</journal-title></journal-title-group></journal-meta>
+      <article-meta>
+        <article-id pub-id-type="pmcid">PMC{uid}</article-id>
+        <title-group><article-title>Article {uid}</article-title></title-group>
+        <pub-date><year>2024</year><month>5</month><day>1</day></pub-date>
+        <abstract><p>Abstract {uid}</p></abstract>
+      </article-meta></front>
+      <back><ref-list><ref><element-citation><source>Nature</source><year>2019</year>
+        <pub-id pub-id-type="doi">10.1000/cited.{uid}</pub-id></element-citation></ref></ref-list></back>
+    </article>"""
+
+
+class FakeNCBI:
+    """
+    Handler answering esearch with search_ids (count probes with their
+    number) and efetch with an article for each requested ID that is
+    available. Search parameters and fetched ID batches are recorded.
+    """
+
+    def __init__(self, search_ids=(), available=()):
+        self.search_ids = list(search_ids)
+        self.available = set(available)
+        self.searches = []
+        self.fetched = []
+
+    def __call__(self, call):
+        params = call["params"] or call["data"]
+        if call["url"].endswith("esearch.fcgi"):
+            self.searches.append(params)
+            if params.get("rettype") == "count":
+                result = {"count": str(len(self.search_ids))}
+            else:
+                result = {"idlist": self.search_ids}
+            return make_response(200, json.dumps({"esearchresult": result}).encode())
+        ids = params["id"].split(",")
+        self.fetched.append(ids)
+        articles = "".join(_efetch_article(uid) for uid in ids if uid in self.available)
+        return make_response(200, f"<pmc-articleset>{articles}</pmc-articleset>".encode())
+
+
+def test_get_pmc_metadata_fetches_only_store_misses(stub_client, store):
+    ncbi = FakeNCBI(available={"2"})
+    client = stub_client(ncbi)
+    store.put_many([_article("PMC1")])
+    articles = get_pmc_metadata(["2", "1", "3"], client=client, store=store, fields=("title",), as_dicts=False)
+    assert [(a.pmcid, dict(a)) for a in articles] == [("PMC2", {"pmcid": "PMC2", "title": "Article 2"}),
+                                                      ("PMC1", {"pmcid": "PMC1", "title": "A stored study"})]
+    assert ncbi.fetched == [["2", "3"]]
+    stored = store.get("PMC2")
+    assert not stored.projected
+    assert stored.references[0].doi == "10.1000/cited.2"
+
+
+def _sync(client, state, store=None, max_attempts=3):
+    return sync_pmc("term", state, client=client, store=store, max_workers=1, max_attempts=max_attempts)
+
+
+def test_sync_state_records_progress_and_retries(stub_client, tmp_path, store):
+    ncbi = FakeNCBI(search_ids=["1", "2", "3"], available={"1", "2"})
+    client = stub_client(ncbi)
+    state = SyncState(str(tmp_path / "sync.json"))
+    first = _sync(client, state, store)
+    assert (first["new"], first["changed"], first["failed"]) == (["PMC1", "PMC2"], [], [])
+    assert sorted(store.get_many(["1", "2"])) == ["PMC1", "PMC2"]
+    entry = state.get("term")
+    assert entry["maxdate"] == first["maxdate"]
+    assert sorted(entry["seen"]) == ["PMC1", "PMC2"]
+    assert (entry["retry"], entry["failed"]) == ({"3": 1}, [])
+
+    state.save()
+    state = SyncState(state.path)
+    ncbi.search_ids = ["1"]
+    ncbi.available.add("3")
+    second = _sync(client, state)
+    assert ncbi.searches[-1]["mindate"] == first["maxdate"]
+    assert sorted(ncbi.fetched[-1]) == ["1", "3"]
+    assert (second["new"], second["changed"]) == (["PMC3"], ["PMC1"])
+    assert state.get("term")["retry"] == {}
+
+
+def test_sync_gives_up_after_max_attempts(stub_client, tmp_path):
+    ncbi = FakeNCBI(search_ids=["9"])
+    client = stub_client(ncbi)
+    state = SyncState(str(tmp_path / "sync.json"))
+    assert _sync(client, state, max_attempts=2)["failed"] == []
+    ncbi.search_ids = []
+    assert _sync(client, state, max_attempts=2)["failed"] == ["PMC9"]
+    assert (state.get("term")["retry"], state.get("term")["failed"]) == ({}, ["PMC9"])
+
+    fetches = len(ncbi.fetched)
+    _sync(client, state, max_attempts=2)
+    assert len(ncbi.fetched) == fetches
+
+    # Found again by a later search, and available this time
+    ncbi.search_ids = ["9"]
+    ncbi.available.add("9")
+    assert _sync(client, state, max_attempts=2)["new"] == ["PMC9"]
+    assert state.get("term")["failed"] == []